@@ -1,12 +1,171 @@
+import hashlib
+import json
 import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import pandas as pd
-from pyairtable import Table
+import requests
+from pyairtable import Api
 import streamlit as st
 
+from http_client import TokenBucket, parse_retry_after
+
 AIRTABLE_API_KEY = os.getenv("AIRTABLE_API_KEY")
 AIRTABLE_BASE_ID = os.getenv("AIRTABLE_BASE_ID")
+# Point this at a local stub (benchmarks/airtable_stub.py) to test uploads without touching a real base
+AIRTABLE_ENDPOINT_URL = os.getenv("AIRTABLE_ENDPOINT_URL", "https://api.airtable.com")
+
+BATCH_SIZE = 10  # Airtable accepts at most 10 records per request
+# A little under Airtable's limit of 5 per base, since requests can arrive closer together than they were sent
+REQUESTS_PER_SECOND = 4.5
+UPLOAD_WORKERS = 4
+# Upserts are idempotent, so server errors and dropped connections are retried as well as 429s
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRIES = 5
+RATE_LIMITED_WAIT = 30  # seconds Airtable asks clients to pause after a 429
+CHECKPOINT_DIR = os.path.join('.scrape_cache', 'airtable')
+CHECKPOINT_EVERY = 50  # batches
+# Errors that will fail every other batch too, so the upload stops instead of retrying them all
+FATAL_STATUSES = (401, 403, 404)
+
+# Fields that identify a record in each table; uploads update the record with the same key instead of adding one
+UPSERT_KEYS = {
+    "Content Inventory": ["URL", "Block Instance ID", "Component"],
+    "Asset Inventory": ["Source Page URL", "Asset URL"],
+    "Link Status Report": ["Source Page URL", "Linked URL"],
+}
+
+
+# One rate limit per base, shared by every upload to it (e.g. content and assets sent back to back)
+_BASE_BUCKETS = {}
+_BASE_BUCKETS_LOCK = threading.Lock()
+
+
+def bucket_for_base(table, requests_per_second=REQUESTS_PER_SECOND):
+    key = (table.api.endpoint_url, table.base.id)
+    with _BASE_BUCKETS_LOCK:
+        if key not in _BASE_BUCKETS:
+            _BASE_BUCKETS[key] = TokenBucket(requests_per_second, 1)
+        return _BASE_BUCKETS[key]
+
+
+def make_api(api_key=AIRTABLE_API_KEY, endpoint_url=AIRTABLE_ENDPOINT_URL):
+    # upsert_records retries itself, so that retries also wait for the rate limit
+    return Api(api_key, retry_strategy=None, endpoint_url=endpoint_url)
+
+
+def retry_delay(attempt, response=None):
+    """Seconds to wait before retrying a failed batch."""
+    if response is not None:
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        if retry_after is not None:
+            return retry_after
+        if response.status_code == 429:
+            return RATE_LIMITED_WAIT
+    return 2 ** attempt
+
+
+def dataframe_to_records(df):
+    df = df.astype(str).replace('nan', '').replace('None', '')
+    return df.to_dict('records')
+
+
+def record_key(fields, key_fields):
+    return json.dumps([fields.get(field, '') for field in key_fields], ensure_ascii=False)
+
+
+def record_hash(fields):
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
 
-def upload_to_airtable(df: pd.DataFrame, table_name: str):
+
+def checkpoint_path_for(base_id, table_name):
+    return os.path.join(CHECKPOINT_DIR, re.sub(r'[^A-Za-z0-9_-]', '_', f"{base_id}-{table_name}") + '.json')
+
+
+def load_checkpoint(path):
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_checkpoint(path, uploaded):
+    """Writes the uploaded record hashes atomically."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(uploaded, f)
+    os.replace(tmp_path, path)
+
+
+def upsert_records(table, records, key_fields, checkpoint_path=None, force=False, workers=UPLOAD_WORKERS,
+                   requests_per_second=REQUESTS_PER_SECOND, progress=None):
+    """
+    Upserts `records` (dicts of field values) into a pyairtable Table on `key_fields`, in batches of
+    BATCH_SIZE sent by `workers` threads under the base's rate limit, with retries. The checkpoint file
+    maps each record's key to the hash of its last uploaded fields, so unchanged records are skipped and
+    an interrupted or partly failed upload resumes with the batches that are still missing. A failed batch
+    doesn't stop the others. `progress(done, total)` is called after every batch.
+    Returns a summary dict of record counts and error messages.
+    """
+    uploaded = {} if force else load_checkpoint(checkpoint_path)
+    # When several rows share a key the last one wins, as it would in Airtable
+    latest = {record_key(fields, key_fields): fields for fields in records}
+    changed = [(key, fields, record_hash(fields)) for key, fields in latest.items()]
+    changed = [(key, fields, digest) for key, fields, digest in changed if uploaded.get(key) != digest]
+    batches = [changed[i:i + BATCH_SIZE] for i in range(0, len(changed), BATCH_SIZE)]
+    summary = {"records": len(latest), "skipped": len(latest) - len(changed), "created": 0, "updated": 0, "failed": 0, "errors": []}
+
+    bucket = bucket_for_base(table, requests_per_second)
+
+    def send(batch):
+        for attempt in range(MAX_RETRIES + 1):
+            bucket.acquire()
+            try:
+                return table.batch_upsert([{"fields": fields} for _, fields, _ in batch], key_fields, typecast=True)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, requests.exceptions.HTTPError) as e:
+                response = e.response
+                if attempt >= MAX_RETRIES or (response is not None and response.status_code not in RETRY_STATUSES):
+                    raise
+                time.sleep(retry_delay(attempt, response))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(send, batch): batch for batch in batches}
+        for done, future in enumerate(as_completed(futures), 1):
+            batch = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                summary["failed"] += len(batch)
+                summary["errors"].append(str(e))
+                if getattr(getattr(e, 'response', None), 'status_code', None) in FATAL_STATUSES:
+                    for pending in futures:
+                        pending.cancel()
+                    summary["failed"] = len(changed) - summary["created"] - summary["updated"]
+                    break
+            else:
+                summary["created"] += len(result["createdRecords"])
+                summary["updated"] += len(result["updatedRecords"])
+                uploaded.update((key, digest) for key, _, digest in batch)
+            if checkpoint_path and done % CHECKPOINT_EVERY == 0:
+                save_checkpoint(checkpoint_path, uploaded)
+            if progress:
+                progress(done, len(batches))
+
+    if checkpoint_path:
+        save_checkpoint(checkpoint_path, uploaded)
+    return summary
+
+
+def upload_to_airtable(df: pd.DataFrame, table_name: str, force: bool = False):
     if not all([AIRTABLE_API_KEY, AIRTABLE_BASE_ID]):
         st.error("Airtable API Key or Base ID is not configured. Upload failed.")
         return
@@ -14,13 +173,21 @@ def upload_to_airtable(df: pd.DataFrame, table_name: str):
     if df.empty:
         st.warning("The data frame is empty. Nothing to upload.")
         return
-        
-    df = df.astype(str).replace('nan', '').replace('None', '')
-    records = df.to_dict('records')
-    table = Table(AIRTABLE_API_KEY, AIRTABLE_BASE_ID, table_name)
 
-    try:
-        table.batch_create(records, typecast=True)
-        st.success(f"Successfully created {len(records)} new records in '{table_name}'.")
-    except Exception as e:
-        st.error(f"Upload failed for '{table_name}': {e}")
+    records = dataframe_to_records(df)
+    table = make_api().table(AIRTABLE_BASE_ID, table_name)
+    progress_bar = st.progress(0.0)
+
+    summary = upsert_records(table, records, UPSERT_KEYS[table_name],
+                             checkpoint_path=checkpoint_path_for(AIRTABLE_BASE_ID, table_name), force=force,
+                             progress=lambda done, total: progress_bar.progress(done / total))
+    progress_bar.empty()
+
+    message = (f"'{table_name}': {summary['created']} records created, {summary['updated']} updated, "
+               f"{summary['skipped']} unchanged and skipped.")
+    if summary["skipped"]:
+        message += " If records are missing in Airtable, tick 'Re-send everything' and send again."
+    if summary["failed"]:
+        st.error(f"{message} {summary['failed']} records failed, send again to retry them. First error: {summary['errors'][0]}")
+    else:
+        st.success(message)
@@ -1,7 +1,11 @@
 import streamlit as st
 import pandas as pd
 import io
-from scrape import scrape_single_url
+import os
+from scrape import scrape_many, BLOCK_MAPPING, HTTP_CLIENT, LINK_STATUS_CACHE, LINK_STATUS_CACHE_PATH, PARSER_BACKENDS
+from page_cache import PageCache, PAGE_CACHE_PATH, NEW, CHANGED, UNCHANGED
+from result_store import ResultStore
+from profiler import Profiler
 import airtable_upload
 import time
 
@@ -23,11 +27,23 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- Initialize Session State ---
-if 'df_content' not in st.session_state: st.session_state.df_content = pd.DataFrame()
-if 'df_assets' not in st.session_state: st.session_state.df_assets = pd.DataFrame()
-if 'df_links' not in st.session_state: st.session_state.df_links = pd.DataFrame()
+# Scrape results (tables 'content', 'assets', 'links' and 'changes') are appended to an on-disk store
+# and only turned into DataFrames for display and export
+if 'results' not in st.session_state: st.session_state.results = ResultStore()
 if 'urls_from_file' not in st.session_state: st.session_state.urls_from_file = ""
 if 'processed_urls' not in st.session_state: st.session_state.processed_urls = set()
+if 'http_stats' not in st.session_state: st.session_state.http_stats = None
+if 'profiler' not in st.session_state: st.session_state.profiler = None
+
+
+# Uploads skip records that were already sent unchanged; this bypasses that, e.g. after records were deleted in Airtable
+RESEND_HELP = "Uploads normally skip records that were already sent and haven't changed since. Tick this to send every record again, e.g. after records were deleted or the table was emptied in Airtable."
+
+
+@st.cache_resource
+def get_page_cache():
+    """One on-disk page cache for the whole Streamlit server, shared by all reruns and sessions."""
+    return PageCache(PAGE_CACHE_PATH, BLOCK_MAPPING)
 
 
 # --- App Header ---
@@ -69,7 +85,7 @@ with st.container(border=True):
     with col2:
         st.subheader("Scrape Options")
         inventory_option = st.checkbox("Component & Asset Inventory", value=True, help="A detailed inventory of all components and assets based on `mapping.json`.")
-        fetch_sizes_option = st.checkbox("Fetch Asset File Sizes", help="Slower. Adds 'File Size' to the Asset Inventory.")
+        fetch_sizes_option = st.checkbox("Fetch Asset File Sizes", help="Slower. Adds 'File Size' (in bytes) to the Asset Inventory. Each asset is only sized once, however many pages use it.")
         
         # EXPLANATION ADDED HERE
         check_links_option = st.checkbox(
@@ -77,6 +93,16 @@ with st.container(border=True):
             help="This is a very heavy job that can time out on large batches. The app automatically saves your progress after each URL. If it stops, just click 'Continue Scraping' to resume where you left off."
         )
         
+        incremental_option = st.checkbox("Incremental Re-audit", value=True, help="Remembers every page between runs. Pages that haven't changed since the last audit are answered by the server with '304 Not Modified' (or have an identical body) and reuse their earlier results without being parsed again. The report shows which pages changed.")
+
+        max_workers_option = st.slider("Concurrent Pages", min_value=1, max_value=32, value=8, help="How many pages are fetched and parsed at the same time.")
+        per_host_limit_option = st.slider("Concurrent Pages per Host", min_value=1, max_value=32, value=8, help="How many of those pages may come from the same host at once. A single-site audit runs at most this many pages concurrently, whatever 'Concurrent Pages' is set to.")
+        engine_option = st.radio("Engine", ["Threads", "Asyncio"], horizontal=True, help="'Asyncio' runs all page, asset and link requests on one event loop, which scales to thousands of requests in flight. Both engines produce the same reports.")
+        parser_option = st.selectbox("HTML Parser", PARSER_BACKENDS, help="'html.parser' needs no extra packages. 'selectolax' scans links and assets much faster, which speeds up link-check-only runs; the component inventory still builds a BeautifulSoup tree, so inventory runs gain little. 'lxml' is a drop-in alternative at about the same speed as 'html.parser'. Both gave the same rows as 'html.parser' on the test pages, but they repair malformed HTML differently, so rows can differ on broken pages.")
+        parse_workers_option = st.slider("Parsing Processes", min_value=0, max_value=os.cpu_count() or 1, value=0, help="Parse pages and compute readability scores in this many separate processes, so large audits use every CPU core. 0 parses inside the fetch workers. Starting the processes takes a few seconds, so this only pays off for larger batches.")
+        profile_option = st.checkbox("Profile Run", help="Records how long every page spends in each stage (fetch, parse, mapping, readability, asset sizes, link checks) and what each mapping.json rule costs. Adds a small overhead; results appear under 'Run Profile'.")
+        rate_limit_option = st.slider("Max Requests per Second per Host", min_value=1, max_value=50, value=20, help="Requests to the same host are rate limited, so large audits don't overload the origin or CDN.")
+
         button_label = "> Run Scraping"
         if st.session_state.processed_urls and urls_to_process_count > 0:
             button_label = "> Continue Scraping"
@@ -101,33 +127,56 @@ if run_button_clicked:
                 progress_bar = st.progress(0)
                 status_text = st.empty()
                 start_time = time.time()
+                HTTP_CLIENT.set_rate_limit(rate_limit_option)
+                HTTP_CLIENT.reset_stats()
+
+                profiler = Profiler(BLOCK_MAPPING) if profile_option else None
+                # The sqlite cache is shared by all sessions; this run's page statuses are kept in its own view
+                page_cache = get_page_cache().run() if incremental_option else None
+
+                # Links verified by an earlier (interrupted) run are not checked again
+                if check_links_option:
+                    LINK_STATUS_CACHE.load(LINK_STATUS_CACHE_PATH)
+
+                results = scrape_many(urls_to_process,
+                                      do_inventory=inventory_option,
+                                      fetch_sizes=fetch_sizes_option,
+                                      check_links=check_links_option,
+                                      max_workers=max_workers_option,
+                                      per_host_limit=per_host_limit_option,
+                                      engine='async' if engine_option == "Asyncio" else 'threads',
+                                      parser=parser_option,
+                                      parse_workers=parse_workers_option,
+                                      page_cache=page_cache,
+                                      profiler=profiler)
 
-                for i, url in enumerate(urls_to_process):
+                for i, (url, content, assets, links, error) in enumerate(results):
                     percent_complete = (i + 1) / len(urls_to_process)
                     progress_bar.progress(percent_complete)
-                    
-                    total_processed_count = len(st.session_state.processed_urls) + 1
-                    status_text.text(f"Processing URL {total_processed_count} of {len(all_urls)}: {url}")
-
-                    try:
-                        content, assets, links = scrape_single_url(url, 
-                                                                do_inventory=inventory_option, 
-                                                                fetch_sizes=fetch_sizes_option, 
-                                                                check_links=check_links_option)
-                        
-                        if content:
-                            st.session_state.df_content = pd.concat([st.session_state.df_content, pd.DataFrame(content)], ignore_index=True)
-                        if assets:
-                            st.session_state.df_assets = pd.concat([st.session_state.df_assets, pd.DataFrame(assets)], ignore_index=True)
-                        if links:
-                            st.session_state.df_links = pd.concat([st.session_state.df_links, pd.DataFrame(links)], ignore_index=True)
-                        
-                        st.session_state.processed_urls.add(url)
-
-                    except Exception as e:
-                        st.error(f"An unexpected error occurred while scraping {url}: {e}")
+
+                    if error is not None:
+                        st.error(f"An unexpected error occurred while scraping {url}: {error}")
+                        continue
+
+                    st.session_state.results.append('content', content)
+                    st.session_state.results.append('assets', assets)
+                    st.session_state.results.append('links', links)
+
+                    if page_cache is not None and url in page_cache.statuses:
+                        st.session_state.results.append('changes', [{"URL": url, "Status": page_cache.statuses[url]}])
+
+                    st.session_state.processed_urls.add(url)
+                    status_text.text(f"Finished URL {len(st.session_state.processed_urls)} of {len(all_urls)}: {url}")
+
+                    if check_links_option and (i + 1) % 25 == 0:
+                        LINK_STATUS_CACHE.save(LINK_STATUS_CACHE_PATH)
+
+                if check_links_option:
+                    LINK_STATUS_CACHE.save(LINK_STATUS_CACHE_PATH)
 
                 end_time = time.time()
+                st.session_state.http_stats = HTTP_CLIENT.stats()
+                st.session_state.profiler = profiler
                 status_text.success(f"Scraping complete for {len(urls_to_process)} URL(s) in {round(end_time - start_time, 2)} seconds.")
                 progress_bar.progress(1.0)
                 st.rerun() 
@@ -136,55 +185,101 @@ if run_button_clicked:
 # --- Results Display ---
 st.divider()
 
-df_content_exists = isinstance(st.session_state.get('df_content'), pd.DataFrame) and not st.session_state.df_content.empty
-df_assets_exists = isinstance(st.session_state.get('df_assets'), pd.DataFrame) and not st.session_state.df_assets.empty
-df_links_exists = isinstance(st.session_state.get('df_links'), pd.DataFrame) and not st.session_state.df_links.empty
+store = st.session_state.results
+df_content_exists = store.count('content') > 0
+df_assets_exists = store.count('assets') > 0
+df_links_exists = store.count('links') > 0
 
 if df_content_exists or df_assets_exists or df_links_exists:
     st.header("Results")
     
     if st.button("Clear All Data & Start Over"):
-        st.session_state.df_content = pd.DataFrame()
-        st.session_state.df_assets = pd.DataFrame()
-        st.session_state.df_links = pd.DataFrame()
+        store.clear()
+        st.session_state.profiler = None
         st.session_state.processed_urls = set()
+        LINK_STATUS_CACHE.clear()
+        if os.path.exists(LINK_STATUS_CACHE_PATH):
+            os.remove(LINK_STATUS_CACHE_PATH)
         st.rerun()
 
+    if st.session_state.http_stats:
+        http_stats = st.session_state.http_stats
+        with st.expander("HTTP Statistics (last run)"):
+            s1, s2, s3, s4 = st.columns(4)
+            s1.metric("Requests", http_stats["requests"])
+            s2.metric("Connection Reuse", f"{http_stats['reuse_ratio']:.0%}")
+            s3.metric("Downloaded", f"{round(http_stats['bytes'] / 1024 / 1024, 2)} MB")
+            s4.metric("Retries", http_stats["retries"])
+            st.bar_chart(pd.Series(http_stats["latency_histogram"], name="Requests"))
+            st.dataframe(pd.Series(http_stats["requests_per_host"], name="Requests").rename_axis("Host").reset_index())
+
+    if st.session_state.profiler is not None and st.session_state.profiler.pages:
+        profiler = st.session_state.profiler
+        with st.expander("Run Profile (last run)"):
+            st.write("Seconds per stage, summed over all pages:")
+            st.bar_chart(profiler.stage_table().set_index("Stage"))
+            st.write("Slowest pages:")
+            st.dataframe(profiler.page_table().sort_values("Total (s)", ascending=False))
+            st.write("Cost per `mapping.json` entry:")
+            st.dataframe(profiler.selector_table())
+            st.write("Requests per host:")
+            st.dataframe(profiler.host_table())
+            t1, t2 = st.columns(2)
+            with t1:
+                st.download_button("↓ Download JSON Lines", profiler.to_jsonl(), "scrape_profile.jsonl", use_container_width=True, key="download_profile")
+            with t2:
+                st.download_button("↓ Download Chrome Trace", profiler.to_chrome_trace(), "scrape_trace.json", use_container_width=True, key="download_trace", help="Open in chrome://tracing or ui.perfetto.dev")
+
+    if store.count('changes') > 0:
+        df_changes = store.to_frame('changes')
+        with st.expander("Page Changes Since Last Run"):
+            p1, p2, p3 = st.columns(3)
+            p1.metric("New", int((df_changes["Status"] == NEW).sum()))
+            p2.metric("Changed", int((df_changes["Status"] == CHANGED).sum()))
+            p3.metric("Unchanged", int((df_changes["Status"] == UNCHANGED).sum()))
+            st.dataframe(df_changes.sort_values("Status"))
+
     if df_content_exists:
+        df_content = store.to_frame('content')
         st.subheader("Component Inventory")
-        st.write(f"Found **{len(st.session_state.df_content)}** individual components.")
+        st.write(f"Found **{len(df_content)}** individual components.")
         c1, c2 = st.columns([1, 4])
         with c1:
             output_content = io.BytesIO()
-            st.session_state.df_content.to_excel(output_content, index=False)
+            df_content.to_excel(output_content, index=False)
             st.download_button("↓ Download Excel", output_content.getvalue(), "component_inventory.xlsx", use_container_width=True, key="download_content")
         with c2:
+            resend_content = st.checkbox("Re-send everything", key="resend_content", help=RESEND_HELP)
             if st.button("↑ Send to Airtable", key="upload_content", use_container_width=True, type="secondary"):
-                airtable_upload.upload_to_airtable(st.session_state.df_content, "Content Inventory")
-        st.dataframe(st.session_state.df_content)
+                airtable_upload.upload_to_airtable(df_content, "Content Inventory", force=resend_content)
+        st.dataframe(df_content)
 
     if df_assets_exists:
+        df_assets = store.to_frame('assets')
         st.subheader("Asset Inventory")
-        st.write(f"Found **{len(st.session_state.df_assets)}** assets.")
+        st.write(f"Found **{len(df_assets)}** assets.")
         a1, a2 = st.columns([1, 4])
         with a1:
             output_assets = io.BytesIO()
-            st.session_state.df_assets.to_excel(output_assets, index=False)
+            df_assets.to_excel(output_assets, index=False)
             st.download_button("↓ Download Excel", output_assets.getvalue(), "asset_inventory.xlsx", use_container_width=True, key="download_assets")
         with a2:
+            resend_assets = st.checkbox("Re-send everything", key="resend_assets", help=RESEND_HELP)
             if st.button("↑ Send to Airtable", key="upload_assets", use_container_width=True, type="secondary"):
-                airtable_upload.upload_to_airtable(st.session_state.df_assets, "Asset Inventory")
-        st.dataframe(st.session_state.df_assets)
+                airtable_upload.upload_to_airtable(df_assets, "Asset Inventory", force=resend_assets)
+        st.dataframe(df_assets)
 
     if df_links_exists:
+        df_links = store.to_frame('links')
         st.subheader("Link Status Report")
-        st.write(f"Found **{len(st.session_state.df_links)}** broken or problematic links.")
+        st.write(f"Found **{len(df_links)}** broken or problematic links.")
         l1, l2 = st.columns([1, 4])
         with l1:
             output_links = io.BytesIO()
-            st.session_state.df_links.to_excel(output_links, index=False)
+            df_links.to_excel(output_links, index=False)
             st.download_button("↓ Download Excel", output_links.getvalue(), "link_status_report.xlsx", use_container_width=True, key="download_links")
         with l2:
+            resend_links = st.checkbox("Re-send everything", key="resend_links", help=RESEND_HELP)
             if st.button("↑ Send to Airtable", key="upload_links", use_container_width=True, type="secondary"):
-                airtable_upload.upload_to_airtable(st.session_state.df_links, "Link Status Report")
-        st.dataframe(st.session_state.df_links)
+                airtable_upload.upload_to_airtable(df_links, "Link Status Report", force=resend_links)
+        st.dataframe(df_links)
@@ -0,0 +1,199 @@
+"""
+A local stand-in for the Airtable records API, for testing uploads without a real base.
+
+    python benchmarks/airtable_stub.py [--port 8770] [--fail-rate 0.1]    # serve until Ctrl+C
+    python benchmarks/airtable_stub.py --check [--rows 300]               # self-check of airtable_upload
+
+The stub keeps tables in memory and implements the upsert request that airtable_upload sends
+(PATCH /v0/<base>/<table> with performUpsert). It rejects batches of more than 10 records,
+answers 429 when a base gets more than 5 requests per second, like Airtable, and fails a
+random `--fail-rate` fraction of requests with 503. To run the app against it, set
+AIRTABLE_ENDPOINT_URL=http://127.0.0.1:<port> together with any AIRTABLE_API_KEY and AIRTABLE_BASE_ID.
+
+--check uploads a synthetic Content Inventory several times and verifies that every record
+arrives exactly once, that re-uploads send only the changed records, and that a run with
+failing requests is completed by the next upload.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+MAX_RECORDS_PER_REQUEST = 10
+MAX_REQUESTS_PER_SECOND = 5
+
+
+class AirtableStub(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fail_rate=0.0):
+        super().__init__(address, StubHandler)
+        self.fail_rate = fail_rate
+        self.tables = {}  # (base, table) -> {key tuple: record}
+        self.requests = 0
+        self.rate_limited = 0
+        self.records_received = 0
+        self._recent = {}  # base -> deque of request times
+        self._next_id = 0
+        self.lock = threading.Lock()
+
+    def over_rate_limit(self, base):
+        now = time.monotonic()
+        with self.lock:
+            self.requests += 1
+            recent = self._recent.setdefault(base, deque())
+            while recent and now - recent[0] > 1.0:
+                recent.popleft()
+            if len(recent) >= MAX_REQUESTS_PER_SECOND:
+                self.rate_limited += 1
+                return True
+            recent.append(now)
+            return False
+
+    def upsert(self, base, table, records, key_fields):
+        created, updated, stored = [], [], []
+        with self.lock:
+            rows = self.tables.setdefault((base, table), {})
+            self.records_received += len(records)
+            for record in records:
+                fields = record["fields"]
+                key = tuple(fields.get(field) for field in key_fields)
+                existing = rows.get(key)
+                if existing is None:
+                    self._next_id += 1
+                    existing = rows[key] = {"id": f"rec{self._next_id:014d}", "createdTime": "2024-01-01T00:00:00.000Z", "fields": {}}
+                    created.append(existing["id"])
+                else:
+                    updated.append(existing["id"])
+                existing["fields"].update(fields)
+                stored.append(existing)
+        return {"records": stored, "createdRecords": created, "updatedRecords": updated}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_PATCH(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        parts = urlsplit(self.path).path.strip('/').split('/')
+        if len(parts) != 3 or parts[0] != 'v0':
+            return self.send_json(404, {"error": "NOT_FOUND"})
+        if not self.headers.get('Authorization', '').startswith('Bearer '):
+            return self.send_json(401, {"error": {"type": "AUTHENTICATION_REQUIRED"}})
+        base, table = parts[1], unquote(parts[2])
+        if self.server.over_rate_limit(base):
+            return self.send_json(429, {"errors": [{"error": "RATE_LIMIT_REACHED"}]})
+        if random.random() < self.server.fail_rate:
+            return self.send_json(503, {"error": "SERVICE_UNAVAILABLE"})
+        records = body.get("records", [])
+        key_fields = body.get("performUpsert", {}).get("fieldsToMergeOn")
+        if not key_fields or not 0 < len(records) <= MAX_RECORDS_PER_REQUEST:
+            return self.send_json(422, {"error": {"type": "INVALID_REQUEST_UNKNOWN"}})
+        self.send_json(200, self.server.upsert(base, table, records, key_fields))
+
+
+def start_stub(port=0, fail_rate=0.0):
+    server = AirtableStub(('127.0.0.1', port), fail_rate=fail_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def synthetic_content_rows(count):
+    return [{"URL": f"https://www.example.com/en/page-{i // 20}", "Block Name": "Hero Banner", "Block Instance ID": f"herobanner-{i % 20 + 1}",
+             "Component": "Headline", "Value": f"Headline number {i}", "Source Element": "H1", "CSS Classes": "hero__title",
+             "Readability Score": "", "Grade Level": ""} for i in range(count)]
+
+
+def run_check(rows):
+    from airtable_upload import UPSERT_KEYS, make_api, upsert_records
+
+    server = start_stub()
+    table = make_api("stub-key", f"http://127.0.0.1:{server.server_port}").table("appStub", "Content Inventory")
+    key_fields = UPSERT_KEYS["Content Inventory"]
+    records = synthetic_content_rows(rows)
+    stored = server.tables.setdefault(("appStub", "Content Inventory"), {})
+    checkpoint_path = os.path.join(tempfile.mkdtemp(prefix='airtable-stub-'), 'checkpoint.json')
+    failures = []
+
+    def step(label, expect_sent, records, **options):
+        received_before = server.records_received
+        started = time.perf_counter()
+        summary = upsert_records(table, records, key_fields, checkpoint_path=checkpoint_path, **options)
+        elapsed = time.perf_counter() - started
+        sent = server.records_received - received_before
+        print(f"{label:<34} sent {sent:>5}  created {summary['created']:>5}  updated {summary['updated']:>5}  "
+              f"skipped {summary['skipped']:>5}  failed {summary['failed']:>4}  {elapsed:6.1f}s")
+        if expect_sent is not None and sent != expect_sent:
+            failures.append(f"{label}: expected {expect_sent} records sent, got {sent}")
+        return summary
+
+    step("initial upload", rows, records)
+    step("unchanged re-upload", 0, records)
+    edited = [dict(record) for record in records]
+    for record in edited[:3]:
+        record["Value"] += " (edited)"
+    step("three records edited", 3, edited)
+    step("forced re-upload", rows, edited, force=True)
+
+    server.fail_rate = 0.3
+    more = synthetic_content_rows(rows * 2)
+    step("new records, 30% of requests fail", None, more)
+    server.fail_rate = 0.0
+    step("re-upload after the failing run", None, more)
+    summary = step("nothing left to send", 0, more)
+
+    if len(stored) != len(more) or summary["failed"]:
+        failures.append(f"expected {len(more)} records in the stub table, found {len(stored)}")
+    if any(stored[tuple(record[field] for field in key_fields)]["fields"] != record for record in more):
+        failures.append("stored records differ from the uploaded ones")
+    print(f"\nStub: {server.requests} requests, {server.rate_limited} answered with 429")
+    server.shutdown()
+    for failure in failures:
+        print(f"CHECK FAILED: {failure}")
+    if failures:
+        sys.exit(1)
+    print("All checks passed.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8770)
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument('--check', action='store_true', help="Run the upload self-check against a temporary stub")
+    parser.add_argument('--rows', type=int, default=300, help="Records uploaded by --check")
+    args = parser.parse_args()
+
+    if args.check:
+        run_check(args.rows)
+        return
+    server = AirtableStub(('127.0.0.1', args.port), fail_rate=args.fail_rate)
+    print(f"Airtable stub listening on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmarks the compiled BlockMatcher against the per-entry soup.select() loop it replaced,
+and checks that both find exactly the same block roots and components.
+
+    python benchmarks/bench_block_matcher.py [--pages DIR] [--repeat N]
+
+DIR defaults to benchmarks/pages; point it at a folder of saved .html pages from the live site
+for a realistic corpus.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from block_matcher import BlockMatcher  # noqa: E402
+
+
+def legacy_matches(soup, block_mapping):
+    """The original approach: one soup.select() per mapping entry and one select_one() per component."""
+    result = []
+    for block_def in block_mapping:
+        elements = soup.select(block_def['selector'])
+        components = []
+        for element in elements:
+            components.append({name: element.select_one(selector) for name, selector in block_def['components'].items()
+                               if selector and selector not in ('*', '[href]')})
+        result.append((elements, components))
+    return result
+
+
+def compiled_matches(soup, matcher):
+    result = []
+    for block_index, elements in enumerate(matcher.match_blocks(soup)[0]):
+        result.append((elements, [matcher.select_components(element, block_index) for element in elements]))
+    return result
+
+
+def same_matches(legacy, compiled):
+    for (legacy_elements, legacy_components), (elements, components) in zip(legacy, compiled):
+        if [id(e) for e in legacy_elements] != [id(e) for e in elements]:
+            return False
+        for legacy_found, found in zip(legacy_components, components):
+            legacy_found = {name: id(e) for name, e in legacy_found.items() if e is not None}
+            if legacy_found != {name: id(e) for name, e in found.items()}:
+                return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', default=os.path.join(REPO_ROOT, 'benchmarks', 'pages'), help="Folder of saved .html pages")
+    parser.add_argument('--mapping', default=os.path.join(REPO_ROOT, 'mapping.json'))
+    parser.add_argument('--repeat', type=int, default=20, help="Times each page is matched per approach")
+    args = parser.parse_args()
+
+    with open(args.mapping, 'r', encoding='utf-8') as f:
+        block_mapping = json.load(f)
+    matcher = BlockMatcher(block_mapping)
+
+    paths = sorted(glob.glob(os.path.join(args.pages, '*.html')))
+    if not paths:
+        sys.exit(f"No .html pages found in {args.pages}")
+
+    rows = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            soup = BeautifulSoup(f.read(), "html.parser")
+
+        identical = same_matches(legacy_matches(soup, block_mapping), compiled_matches(soup, matcher))
+
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            legacy_matches(soup, block_mapping)
+        legacy_seconds = (time.perf_counter() - started) / args.repeat
+
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            compiled_matches(soup, matcher)
+        compiled_seconds = (time.perf_counter() - started) / args.repeat
+
+        rows.append({
+            "page": os.path.basename(path),
+            "elements": len(soup.find_all(True)),
+            "identical": identical,
+            "legacy_ms": round(legacy_seconds * 1000, 2),
+            "compiled_ms": round(compiled_seconds * 1000, 2),
+            "speedup": round(legacy_seconds / compiled_seconds, 1) if compiled_seconds else None,
+        })
+
+    print(f"{'Page':<30}{'Elements':>10}{'Legacy ms':>12}{'Compiled ms':>13}{'Speedup':>9}  Identical")
+    for row in rows:
+        print(f"{row['page']:<30}{row['elements']:>10}{row['legacy_ms']:>12}{row['compiled_ms']:>13}{row['speedup']:>8}x  {row['identical']}")
+    total_legacy = sum(row['legacy_ms'] for row in rows)
+    total_compiled = sum(row['compiled_ms'] for row in rows)
+    print(f"{'Total':<30}{'':>10}{round(total_legacy, 2):>12}{round(total_compiled, 2):>13}{round(total_legacy / total_compiled, 1):>8}x")
+
+    if not all(row['identical'] for row in rows):
+        sys.exit("Compiled matcher results differ from soup.select() on at least one page.")
+
+
+if __name__ == '__main__':
+    main()
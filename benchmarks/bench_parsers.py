@@ -0,0 +1,105 @@
+"""
+Parity check and benchmark for the HTML parser backends in scrape.PARSER_BACKENDS.
+
+    python benchmarks/bench_parsers.py [--pages DIR] [--repeat N] [--backends html.parser lxml ...]
+
+Every backend runs the full offline extraction (component inventory, asset inventory and link collection)
+over each saved page. Its content, asset and link rows must match the 'html.parser' reference exactly;
+any difference is printed and the script exits non-zero. Then pages/sec is reported per backend for
+parsing alone, for the link check's extraction alone, and for the full extraction (which includes the
+backend-independent readability scoring).
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.chdir(REPO_ROOT)  # scrape.py loads mapping.json from the working directory
+
+from scrape import LexborHTMLParser, PARSER_BACKENDS, check_parser_backend, extract_page, make_soup  # noqa: E402
+
+REFERENCE_BACKEND = 'html.parser'
+PAGE_URL = "https://www.example.com/en/page"
+
+
+def extract(html, backend):
+    content_rows, asset_rows, link_urls = extract_page(PAGE_URL, html, do_inventory=True, check_links=True, parser=backend)
+    return content_rows, asset_rows, sorted(link_urls)
+
+
+def describe_differences(name, reference_rows, rows):
+    """Returns printable lines for the rows missing from or added to `rows`, compared with the reference."""
+    lines = []
+    if len(reference_rows) != len(rows):
+        lines.append(f"    {name}: {len(reference_rows)} rows with {REFERENCE_BACKEND}, {len(rows)} rows here")
+    lines += [f"    {name} missing: {row}" for row in reference_rows if row not in rows][:5]
+    lines += [f"    {name} extra:   {row}" for row in rows if row not in reference_rows][:5]
+    if not lines:
+        lines.append(f"    {name}: same rows in a different order")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', default=os.path.join(REPO_ROOT, 'benchmarks', 'pages'), help="Folder of saved .html pages")
+    parser.add_argument('--repeat', type=int, default=5, help="Times each page is extracted per backend")
+    parser.add_argument('--backends', nargs='+', default=list(PARSER_BACKENDS), choices=PARSER_BACKENDS)
+    args = parser.parse_args()
+
+    backends = []
+    for backend in args.backends:
+        try:
+            check_parser_backend(backend)
+            backends.append(backend)
+        except ImportError as e:
+            print(f"Skipping {backend}: {e}")
+
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(args.pages, '*.html'))):
+        with open(path, 'rb') as f:
+            pages[os.path.basename(path)] = f.read().decode('utf-8')
+    if not pages:
+        sys.exit(f"No .html pages found in {args.pages}")
+
+    # --- Parity ---
+    reference = {name: extract(html, REFERENCE_BACKEND) for name, html in pages.items()}
+    failures = 0
+    for backend in backends:
+        if backend == REFERENCE_BACKEND:
+            continue
+        for name, html in pages.items():
+            result = extract(html, backend)
+            for label, reference_rows, rows in zip(("content rows", "asset rows", "links"), reference[name], result):
+                if reference_rows != rows:
+                    failures += 1
+                    print(f"PARITY FAILURE: {backend} on {name}")
+                    print("\n".join(describe_differences(label, reference_rows, rows)))
+    print(f"Parity: {len(backends) - 1} backend(s) x {len(pages)} page(s) checked against {REFERENCE_BACKEND}, {failures} failure(s)\n")
+
+    # --- Throughput ---
+    def parse_only(html, backend):
+        return LexborHTMLParser(html) if backend == 'selectolax' else make_soup(html, backend)
+
+    def links_only(html, backend):
+        return extract_page(PAGE_URL, html, check_links=True, parser=backend)
+
+    def pages_per_second(work, backend):
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            for html in pages.values():
+                work(html, backend)
+        return args.repeat * len(pages) / (time.perf_counter() - started)
+
+    print(f"{'Backend':<14}{'Parse pages/s':>15}{'Links pages/s':>15}{'Full pages/s':>14}")
+    for backend in backends:
+        print(f"{backend:<14}{pages_per_second(parse_only, backend):>15.1f}{pages_per_second(links_only, backend):>15.1f}{pages_per_second(extract, backend):>14.1f}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
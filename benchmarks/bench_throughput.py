@@ -0,0 +1,171 @@
+"""
+End-to-end throughput benchmark against a local fixture site (see fixture_site.py), so no live site is needed.
+
+    python benchmarks/bench_throughput.py [--sizes 100 1000 10000] [--modes inventory sizes links] [--output results.json]
+
+Each mode is a scrape of N generated pages with scrape_many:
+    inventory   component and asset inventory
+    sizes       inventory plus asset file sizes (HEAD, with the range fallback for assets without Content-Length)
+    links       broken link check
+
+Every (mode, size) case runs in a fresh process with empty caches, against a fixture server running in its own
+process, and reports pages/sec, unique links checked per second, assets sized, the requests the server saw,
+and the case process's peak memory (RSS). The results are written as JSON to --output, or to stdout.
+The fixture server shares the machine's CPUs, so compare results from the same machine and options only.
+Pass --engine, --workers, --parser or --parse-workers to compare scrape settings, and the fixture options
+(--latency-ms, --missing-length, --not-found, --too-many, ...) to change how the site behaves.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import urllib.request
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from fixture_site import add_site_arguments  # noqa: E402
+
+MODES = {
+    'inventory': dict(do_inventory=True),
+    'sizes': dict(do_inventory=True, fetch_sizes=True),
+    'links': dict(check_links=True),
+}
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)  # bytes on macOS, KB elsewhere
+
+
+def server_stats(base_url):
+    with urllib.request.urlopen(f"{base_url}/__stats") as response:
+        return json.load(response)
+
+
+def run_case(args):
+    """Runs one (mode, size) case in this process and prints its result as one JSON line."""
+    os.chdir(REPO_ROOT)  # scrape.py loads mapping.json from the working directory
+    from scrape import ASSET_SIZE_CACHE, HTTP_CLIENT, LINK_STATUS_CACHE, scrape_many
+
+    HTTP_CLIENT.set_rate_limit(args.rate_limit)
+    urls = [f"{args.base_url}/page/{number}.html" for number in range(args.pages)]
+    baseline_mb = peak_rss_mb()
+    before = server_stats(args.base_url)
+    rows = {"content": 0, "assets": 0, "links": 0}
+    failed = 0
+
+    started = time.perf_counter()
+    for url, content, assets, links, error in scrape_many(urls, max_workers=args.workers, per_host_limit=args.per_host_limit,
+                                                          engine=args.engine, parser=args.parser,
+                                                          parse_workers=args.parse_workers, **MODES[args.mode]):
+        failed += error is not None
+        rows["content"] += len(content)
+        rows["assets"] += len(assets)
+        rows["links"] += len(links)
+    elapsed = time.perf_counter() - started
+
+    after = server_stats(args.base_url)
+    requests = {key: after.get(key, 0) - before.get(key, 0) for key in after if after.get(key, 0) != before.get(key, 0)}
+    http_stats = HTTP_CLIENT.stats()
+    print(json.dumps({
+        "mode": args.mode,
+        "pages": args.pages,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(args.pages / elapsed, 2),
+        "links_checked": len(LINK_STATUS_CACHE),
+        "links_checked_per_sec": round(len(LINK_STATUS_CACHE) / elapsed, 2),
+        "assets_sized": len(ASSET_SIZE_CACHE),
+        "failed_pages": failed,
+        "content_rows": rows["content"],
+        "asset_rows": rows["assets"],
+        "broken_link_rows": rows["links"],
+        "server_requests": requests,
+        "client_retries": http_stats["retries"],
+        "connection_reuse": http_stats["reuse_ratio"],
+        "baseline_rss_mb": baseline_mb,
+        "peak_rss_mb": peak_rss_mb(),
+    }))
+
+
+def start_fixture_site(args, pages):
+    """Starts fixture_site.py in its own process and returns (process, base URL)."""
+    command = [sys.executable, os.path.join(REPO_ROOT, 'benchmarks', 'fixture_site.py'), '--port', '0', '--pages', str(pages),
+               '--blocks', str(args.blocks), '--links', str(args.links), '--seed', str(args.seed),
+               '--latency-ms', str(args.latency_ms), '--jitter-ms', str(args.jitter_ms),
+               '--missing-length', str(args.missing_length), '--not-found', str(args.not_found),
+               '--too-many', str(args.too_many), '--retry-after', str(args.retry_after)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    first_line = process.stdout.readline()
+    if not first_line:
+        process.kill()
+        raise RuntimeError("The fixture site did not start")
+    return process, first_line.split()[-1]
+
+
+def case_command(args, mode, pages, base_url):
+    return [sys.executable, os.path.abspath(__file__), '--case', '--mode', mode, '--pages', str(pages), '--base-url', base_url,
+            '--engine', args.engine, '--workers', str(args.workers), '--per-host-limit', str(args.per_host_limit),
+            '--parser', args.parser, '--parse-workers', str(args.parse_workers), '--rate-limit', str(args.rate_limit)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000], help="Numbers of pages to scrape")
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--output', help="JSON file for the results (default: stdout)")
+    parser.add_argument('--engine', choices=['threads', 'async'], default='threads')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--per-host-limit', type=int, default=8, help="The fixture site is a single host")
+    parser.add_argument('--parser', default='html.parser')
+    parser.add_argument('--parse-workers', type=int, default=0)
+    parser.add_argument('--rate-limit', type=float, default=1000.0, help="Requests per second to the fixture host")
+    add_site_arguments(parser)
+    # Used by the case processes this script starts
+    parser.add_argument('--case', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--mode', help=argparse.SUPPRESS)
+    parser.add_argument('--pages', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        run_case(args)
+        return
+
+    results = []
+    for pages in args.sizes:
+        # One server per site size, so link targets and asset pools scale with the site
+        server, base_url = start_fixture_site(args, pages)
+        try:
+            for mode in args.modes:
+                print(f"{mode} x {pages} pages ...", file=sys.stderr, flush=True)
+                case = subprocess.run(case_command(args, mode, pages, base_url), stdout=subprocess.PIPE, text=True, check=True)
+                result = json.loads(case.stdout.strip().splitlines()[-1])
+                print(f"  {result['pages_per_sec']} pages/sec, {result['links_checked_per_sec']} links checked/sec, "
+                      f"peak {result['peak_rss_mb']} MB", file=sys.stderr, flush=True)
+                results.append(result)
+        finally:
+            server.terminate()
+            server.wait()
+
+    report = {
+        "created": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "options": {key: value for key, value in vars(args).items() if key not in ('case', 'mode', 'pages', 'base_url', 'output')},
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
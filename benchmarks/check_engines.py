@@ -0,0 +1,78 @@
+"""
+Parity check for the scrape engines: the thread engine and the asyncio engine must produce the same reports.
+
+    python benchmarks/check_engines.py [--pages DIR]
+
+Serves the saved pages (default benchmarks/pages) from a local HTTP server and scrapes each of them with
+every engine, with the component inventory, asset sizes and the broken link check turned on. The caches
+are cleared between engines, so each engine sends its own requests. Content, asset and link rows must match
+exactly; any difference is printed and the script exits non-zero. Links on the pages that point to other
+hosts are requested too, so both engines see the same network either way.
+"""
+import argparse
+import functools
+import glob
+import json
+import os
+import sys
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.chdir(REPO_ROOT)  # scrape.py loads mapping.json from the working directory
+
+from scrape import ASSET_SIZE_CACHE, ENGINES, LINK_STATUS_CACHE, scrape_many  # noqa: E402
+
+TABLES = ("content rows", "asset rows", "link rows")
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def scrape_with(engine, urls):
+    """Rows per table from one engine, sorted so that completion order doesn't matter."""
+    LINK_STATUS_CACHE.clear()
+    ASSET_SIZE_CACHE.clear()
+    tables = ([], [], [])
+    for url, content, assets, links, error in scrape_many(urls, do_inventory=True, fetch_sizes=True, check_links=True, engine=engine):
+        if error is not None:
+            sys.exit(f"{engine} failed on {url}: {error}")
+        for rows, new_rows in zip(tables, (content, assets, links)):
+            rows.extend(new_rows)
+    return [sorted(json.dumps(row, sort_keys=True, default=str) for row in rows) for rows in tables]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', default=os.path.join(REPO_ROOT, 'benchmarks', 'pages'), help="Folder of saved .html pages")
+    args = parser.parse_args()
+
+    names = sorted(os.path.basename(path) for path in glob.glob(os.path.join(args.pages, '*.html')))
+    if not names:
+        sys.exit(f"No .html pages found in {args.pages}")
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(QuietHandler, directory=args.pages))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = [f"http://127.0.0.1:{server.server_port}/{name}" for name in names]
+
+    reference_engine, *other_engines = ENGINES
+    reference = scrape_with(reference_engine, urls)
+    failures = 0
+    for engine in other_engines:
+        for label, reference_rows, rows in zip(TABLES, reference, scrape_with(engine, urls)):
+            missing = [row for row in reference_rows if row not in rows]
+            extra = [row for row in rows if row not in reference_rows]
+            if missing or extra or len(rows) != len(reference_rows):
+                failures += 1
+                print(f"PARITY FAILURE: {engine} {label}")
+                print("\n".join([f"    missing: {row}" for row in missing[:5]] + [f"    extra:   {row}" for row in extra[:5]]))
+    server.shutdown()
+    print(f"Parity: {len(other_engines)} engine(s) x {len(urls)} page(s) checked against {reference_engine}, {failures} failure(s)")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+"""
+A synthetic website for offline benchmarks: generated pages built from the blocks in mapping.json,
+served over local HTTP with configurable latency and failure rates.
+
+    python benchmarks/fixture_site.py [--port 8790] [--latency-ms 10] [--missing-length 0.3] [--not-found 0.05] [--too-many 0.01]
+    python benchmarks/fixture_site.py --write DIR [--pages 20]    # save generated pages as .html files instead
+
+Paths served:
+    /page/<n>.html     a generated page (every page number exists)
+    /link/<name>       a plain link target; a `--not-found` fraction of them answer 404
+    /asset/<name>      an image or document of a fixed pseudo-random size; a `--not-found` fraction answer 404,
+                       and a `--missing-length` fraction leave Content-Length off HEAD responses (like many CDNs),
+                       so the size has to come from a `Range: bytes=0-0` request
+    /__stats           request counters as JSON
+
+Which links and assets are missing depends only on their path, so every run of a benchmark sees the same
+site. `--too-many` answers that fraction of all requests with 429 and `Retry-After: --retry-after`, at random.
+
+Each page has a header with navigation shared by all pages, `--blocks` blocks picked from mapping.json
+(so the component inventory finds them), content links unique to the page, and images and documents
+drawn from a pool shared with other pages, like a real site's logos and product shots.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from block_matcher import compile_selector  # noqa: E402
+
+WORDS = ("design furniture table chair lamp sofa oak walnut ash linen wool leather studio collection classic modern "
+         "comfort craft detail light space living dining office outdoor edition colour finish shape natural material "
+         "timeless quality sustainable handmade archive designer story inspiration home").split()
+NAV_LINKS = 12
+IMAGE_TYPES = ('jpg', 'png', 'webp', 'svg')
+DOCUMENT_TYPES = ('pdf', 'docx', 'zip')
+VOID_TAGS = ('img', 'source', 'br', 'hr', 'input')
+
+
+def path_fraction(path, salt):
+    """A stable number in [0, 1) for a path, so a link is broken (or an asset unsized) on every run."""
+    digest = hashlib.sha1(f"{salt}:{path}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') / 2 ** 64
+
+
+def asset_size(path):
+    """Pseudo-random size in bytes, between 1 KB and 2 MB."""
+    return 1024 + int(path_fraction(path, 'size') * 2 * 1024 * 1024)
+
+
+# --- Page generator ---
+def sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def element_html(compound, inner, rng, asset_url):
+    tag = compound.tag or ('img' if 'src' in compound.attrs else 'a' if 'href' in compound.attrs else 'div')
+    attrs = []
+    if compound.classes:
+        attrs.append(f'class="{" ".join(compound.classes)}"')
+    if 'src' in compound.attrs or tag == 'img':
+        attrs.append(f'src="{asset_url()}" alt="{rng.choice(WORDS)}"')
+    if 'href' in compound.attrs or tag == 'a':
+        attrs.append(f'href="/link/{rng.choice(WORDS)}-{rng.randrange(10 ** 6)}"')
+    open_tag = f"<{tag}{' ' if attrs else ''}{' '.join(attrs)}>"
+    return open_tag if tag in VOID_TAGS else f"{open_tag}{inner}</{tag}>"
+
+
+def selector_html(selector, inner, rng, asset_url):
+    """Markup matching the first alternative of a selector group, nested for descendant combinators."""
+    alternatives = compile_selector(selector) if selector else None
+    if not alternatives:
+        return inner
+    html = inner
+    for compound in reversed(alternatives[0].compounds):
+        html = element_html(compound, html, rng, asset_url)
+    return html
+
+
+def block_html(block_def, rng, asset_url):
+    components = []
+    for selector in block_def['components'].values():
+        if selector and selector not in ('*', '[href]'):
+            components.append(selector_html(selector, sentence(rng, rng.randint(4, 30)), rng, asset_url))
+    inner = "".join(components) or sentence(rng)
+    return selector_html(block_def['selector'], inner, rng, asset_url)
+
+
+def generate_page(number, block_mapping, pages=1000, blocks=12, links=20, seed=0):
+    """
+    HTML for page `number` of a site with `pages` pages. The same arguments always give the same page.
+    Image and document pools grow with the site, so larger sites have more unique assets.
+    """
+    rng = random.Random(f"{seed}:{number}")
+    image_pool, document_pool = max(20, pages // 2), max(10, pages // 10)
+
+    def image_url():
+        return f"/asset/image-{rng.randrange(image_pool)}.{rng.choice(IMAGE_TYPES)}"
+
+    nav = "".join(f'<li><a href="/page/{i}.html">{WORDS[i % len(WORDS)].title()}</a></li>' for i in range(min(NAV_LINKS, pages)))
+    body = [f'<header class="site-header"><img src="/asset/logo.svg" alt="Logo"><nav><ul>{nav}</ul></nav></header><main>']
+    for block_def in rng.sample(block_mapping, min(blocks, len(block_mapping))):
+        body.append(block_html(block_def, rng, image_url))
+    body.append('<section class="related"><ul>')
+    for i in range(links):
+        target = f"/page/{rng.randrange(pages)}.html" if i % 2 else f"/link/{number}-{i}"
+        body.append(f'<li><a href="{target}">{sentence(rng, 4)}</a></li>')
+    for _ in range(max(1, links // 5)):
+        document = f"/asset/document-{rng.randrange(document_pool)}.{rng.choice(DOCUMENT_TYPES)}"
+        body.append(f'<li><a href="{document}">{sentence(rng, 3)}</a></li>')
+    body.append('</ul></section></main><footer class="site-footer"><a href="/link/privacy">Privacy</a> <a href="mailto:info@example.com">Contact</a></footer>')
+    return (f'<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>Page {number}</title>'
+            f'<link rel="stylesheet" href="/asset/site.css"><script src="/asset/site.js"></script></head>'
+            f'<body>{"".join(body)}</body></html>')
+
+
+# --- Server ---
+class FixtureSite(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, block_mapping, pages=1000, blocks=12, links=20, seed=0, latency_ms=10.0, jitter_ms=0.0,
+                 missing_length=0.3, not_found=0.05, too_many=0.0, retry_after=0):
+        super().__init__(address, FixtureHandler)
+        self.block_mapping = block_mapping
+        self.pages, self.blocks, self.links, self.seed = pages, blocks, links, seed
+        self.latency_ms, self.jitter_ms = latency_ms, jitter_ms
+        self.missing_length, self.not_found, self.too_many, self.retry_after = missing_length, not_found, too_many, retry_after
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def count(self, key):
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + 1
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def respond(self, status, body=b'', content_type='text/html; charset=utf-8', headers=None, send_length=True):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        if send_length:
+            self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        server = self.server
+        path = self.path.split('?', 1)[0]
+        if path == '/__stats':
+            with server.lock:
+                return self.respond(200, json.dumps(server.counters).encode('utf-8'), 'application/json')
+        kind = path.strip('/').split('/', 1)[0]
+        server.count(f"{self.command} {kind}")
+        if server.latency_ms or server.jitter_ms:
+            time.sleep((server.latency_ms + random.uniform(0, server.jitter_ms)) / 1000)
+        if server.too_many and random.random() < server.too_many:
+            server.count("429")
+            return self.respond(429, b'Too Many Requests', 'text/plain', {'Retry-After': str(server.retry_after)})
+
+        page = re.fullmatch(r'/page/(\d+)\.html', path)
+        if page:
+            html = generate_page(int(page.group(1)), server.block_mapping, server.pages, server.blocks, server.links, server.seed)
+            return self.respond(200, html.encode('utf-8'))
+        if kind not in ('link', 'asset') or path_fraction(path, 'not-found') < server.not_found:
+            server.count("404")
+            return self.respond(404, b'Not Found', 'text/plain')
+        if kind == 'link':
+            return self.respond(200, b'<!DOCTYPE html><html><body>Link target</body></html>')
+        self.send_asset(path)
+
+    def send_asset(self, path):
+        size = asset_size(path)
+        content_type = 'application/octet-stream'
+        range_header = self.headers.get('Range', '')
+        if self.command == 'GET' and range_header.startswith('bytes=0-'):
+            end = min(size - 1, int(range_header[len('bytes=0-'):] or size - 1))
+            return self.respond(206, b'\0' * (end + 1), content_type, {'Content-Range': f"bytes 0-{end}/{size}"})
+        if self.command == 'HEAD' and path_fraction(path, 'missing-length') < self.server.missing_length:
+            return self.respond(200, content_type=content_type, send_length=False)
+        self.respond(200, b'\0' * size, content_type)
+
+
+def load_mapping(path=os.path.join(REPO_ROOT, 'mapping.json')):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def add_site_arguments(parser):
+    """The page and server options, shared with bench_throughput.py."""
+    parser.add_argument('--blocks', type=int, default=12, help="Blocks from mapping.json per page")
+    parser.add_argument('--links', type=int, default=20, help="Content links per page, half of them to other pages")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency-ms', type=float, default=10.0, help="Delay before every response")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="Extra random delay of up to this much")
+    parser.add_argument('--missing-length', type=float, default=0.3, help="Fraction of assets without Content-Length on HEAD")
+    parser.add_argument('--not-found', type=float, default=0.05, help="Fraction of links and assets that answer 404")
+    parser.add_argument('--too-many', type=float, default=0.0, help="Fraction of all requests answered with 429")
+    parser.add_argument('--retry-after', type=int, default=0, help="Retry-After seconds sent with each 429")
+
+
+def site_options(args, pages):
+    return dict(pages=pages, blocks=args.blocks, links=args.links, seed=args.seed, latency_ms=args.latency_ms,
+                jitter_ms=args.jitter_ms, missing_length=args.missing_length, not_found=args.not_found,
+                too_many=args.too_many, retry_after=args.retry_after)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8790, help="0 picks a free port")
+    parser.add_argument('--pages', type=int, default=1000, help="Size of the site, which sets how far links and asset pools reach")
+    parser.add_argument('--mapping', default=os.path.join(REPO_ROOT, 'mapping.json'))
+    parser.add_argument('--write', metavar='DIR', help="Write --pages generated pages to DIR instead of serving them")
+    add_site_arguments(parser)
+    args = parser.parse_args()
+    block_mapping = load_mapping(args.mapping)
+
+    if args.write:
+        os.makedirs(args.write, exist_ok=True)
+        for number in range(args.pages):
+            with open(os.path.join(args.write, f"page-{number}.html"), 'w', encoding='utf-8') as f:
+                f.write(generate_page(number, block_mapping, args.pages, args.blocks, args.links, args.seed))
+        print(f"Wrote {args.pages} pages to {args.write}")
+        return
+
+    server = FixtureSite(('127.0.0.1', args.port), block_mapping, **site_options(args, args.pages))
+    # The first line of output is read by bench_throughput.py to find the port
+    print(f"Fixture site listening on http://127.0.0.1:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
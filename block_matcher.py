@@ -0,0 +1,219 @@
+import re
+import time
+from bisect import bisect_left, bisect_right
+
+# A compound selector this matcher handles itself: an optional tag, then any number of .class and [attr] parts
+_COMPOUND_RE = re.compile(r'^(?P<tag>[a-zA-Z][\w-]*|\*)?(?P<rest>(?:\.[\w-]+|\[[\w-]+\])*)$')
+_PART_RE = re.compile(r'\.([\w-]+)|\[([\w-]+)\]')
+
+
+class Compound:
+    """One compound selector such as `a.button[href]`."""
+    __slots__ = ('tag', 'classes', 'attrs')
+
+    def __init__(self, tag, classes, attrs):
+        self.tag = tag
+        self.classes = classes
+        self.attrs = attrs
+
+    def matches(self, element):
+        if self.tag and element.name != self.tag:
+            return False
+        if self.classes:
+            element_classes = element.get('class') or ()
+            if not all(c in element_classes for c in self.classes):
+                return False
+        return all(element.has_attr(a) for a in self.attrs)
+
+
+class ComplexSelector:
+    """A chain of compounds joined by descendant combinators, e.g. `.ar-banner__image img[src]`."""
+    __slots__ = ('compounds',)
+
+    def __init__(self, compounds):
+        self.compounds = compounds
+
+    @property
+    def subject(self):
+        return self.compounds[-1]
+
+    def matches(self, element):
+        if not self.subject.matches(element):
+            return False
+        # Right-to-left: for descendant-only chains, taking the nearest matching ancestor is always correct.
+        # Like soupsieve, ancestors may lie outside the element a search was scoped to.
+        remaining = len(self.compounds) - 2
+        parent = element.parent
+        while remaining >= 0 and parent is not None and parent.parent is not None:
+            if self.compounds[remaining].matches(parent):
+                remaining -= 1
+            parent = parent.parent
+        return remaining < 0
+
+
+def compile_selector(selector):
+    """
+    Compiles a selector group (comma-separated) into a list of ComplexSelectors.
+    Returns None for anything beyond tags, classes, [attr] presence and descendant combinators;
+    those selectors fall back to soupsieve.
+    """
+    alternatives = []
+    for alternative in selector.split(','):
+        compounds = []
+        for part in alternative.split():
+            match = _COMPOUND_RE.match(part)
+            if not match or not part:
+                return None
+            tag = match.group('tag')
+            classes, attrs = [], []
+            for class_name, attr in _PART_RE.findall(match.group('rest')):
+                if class_name:
+                    classes.append(class_name)
+                else:
+                    attrs.append(attr)
+            compounds.append(Compound(None if tag in (None, '*') else tag.lower(), tuple(classes), tuple(attrs)))
+        if not compounds:
+            return None
+        alternatives.append(ComplexSelector(compounds))
+    return alternatives
+
+
+class SelectorIndex:
+    """
+    Dispatch index from an element's tag and classes to the compiled selectors that could match it,
+    keyed by the rightmost compound. Selectors that can't be compiled are kept in `fallback`.
+    """
+
+    def __init__(self, keyed_selectors):
+        keyed_selectors = list(keyed_selectors)
+        self.by_class = {}
+        self.by_tag = {}
+        self.universal = []
+        self.fallback = {}
+        for key, selector in keyed_selectors:
+            alternatives = compile_selector(selector)
+            if alternatives is None:
+                self.fallback[key] = selector
+                continue
+            for alternative in alternatives:
+                subject = alternative.subject
+                if subject.classes:
+                    self.by_class.setdefault(subject.classes[0], []).append((key, alternative))
+                elif subject.tag:
+                    self.by_tag.setdefault(subject.tag, []).append((key, alternative))
+                else:
+                    self.universal.append((key, alternative))
+        self.size = len({key for key, _ in keyed_selectors}) - len(self.fallback)
+
+    def candidates(self, element):
+        """Yields (key, selector) pairs worth testing against `element`."""
+        for class_name in element.get('class') or ():
+            yield from self.by_class.get(class_name, ())
+        yield from self.by_tag.get(element.name, ())
+        yield from self.universal
+
+
+class ClaimedSubtrees:
+    """
+    Tracks the subtrees already claimed by a block as pre-order intervals [start, end], so
+    "is this element inside a claimed block?" is a binary search instead of a walk over its parents.
+    `positions` maps id(element) to the element's (start, end) interval, as built by BlockMatcher.match_blocks.
+    """
+
+    def __init__(self, positions):
+        self.positions = positions
+        # Disjoint intervals sorted by start; subtrees are either nested or disjoint, so nested claims are merged away
+        self._starts = []
+        self._ends = []
+
+    def contains(self, element):
+        start = self.positions[id(element)][0]
+        i = bisect_right(self._starts, start) - 1
+        return i >= 0 and self._ends[i] >= start
+
+    def claim(self, element):
+        start, end = self.positions[id(element)]
+        # Drop claimed subtrees nested inside this one (a later, wider block can wrap an earlier one)
+        lo = bisect_left(self._starts, start)
+        hi = bisect_right(self._starts, end)
+        self._starts[lo:hi] = [start]
+        self._ends[lo:hi] = [end]
+
+
+class BlockMatcher:
+    """
+    BLOCK_MAPPING precompiled once into dispatch indexes, so a page is walked once to find every block root
+    instead of once per mapping entry, and each block's subtree once to find all of its components.
+    Results are the same as soup.select(block['selector']) and element.select_one(component_selector).
+    """
+
+    def __init__(self, block_mapping):
+        self.block_mapping = block_mapping
+        self.block_index = SelectorIndex((i, block_def['selector']) for i, block_def in enumerate(block_mapping))
+        self.component_indexes = [
+            SelectorIndex((name, selector) for name, selector in block_def['components'].items()
+                          if selector and selector not in ('*', '[href]'))
+            for block_def in block_mapping
+        ]
+
+    def match_blocks(self, soup, profile=None):
+        """
+        Returns (matches, positions): one list of matching elements per mapping entry, each in document order,
+        and the pre-order interval of every element on the page for ClaimedSubtrees.
+        With a profile (see profiler.py), every selector test is timed and counted per mapping entry.
+        """
+        matches = [[] for _ in self.block_mapping]
+        positions = {}
+        open_elements = []  # The current element's ancestors, innermost last
+        elements = soup.find_all(True)
+        for position, element in enumerate(elements):
+            # Every open element that isn't this element's parent has no more descendants: close its interval
+            while open_elements and open_elements[-1] is not element.parent:
+                closed = open_elements.pop()
+                positions[id(closed)] = (positions[id(closed)], position - 1)
+            positions[id(element)] = position
+            open_elements.append(element)
+
+            for block_index, selector in self.block_index.candidates(element):
+                found = matches[block_index]
+                if found and found[-1] is element:
+                    continue
+                if profile is None:
+                    if selector.matches(element):
+                        found.append(element)
+                    continue
+                started = time.perf_counter()
+                matched = selector.matches(element)
+                profile.selector_test(block_index, time.perf_counter() - started, matched)
+                if matched:
+                    found.append(element)
+        for closed in open_elements:
+            positions[id(closed)] = (positions[id(closed)], len(elements) - 1)
+
+        for block_index, selector in self.block_index.fallback.items():
+            started = time.perf_counter()
+            matches[block_index] = soup.select(selector)
+            if profile is not None:
+                profile.selector_test(block_index, time.perf_counter() - started, len(matches[block_index]))
+        if profile is not None:
+            profile.elements += len(elements)
+        return matches, positions
+
+    def select_components(self, element, block_index, profile=None):
+        """Returns {component name: first matching descendant} for one block instance; missing components are left out."""
+        index = self.component_indexes[block_index]
+        found = {}
+        if index.size:
+            for descendant in element.find_all(True):
+                if profile is not None:
+                    profile.elements += 1
+                for component_name, selector in index.candidates(descendant):
+                    if component_name not in found and selector.matches(descendant):
+                        found[component_name] = descendant
+                if len(found) == index.size:
+                    break
+        for component_name, selector in index.fallback.items():
+            child_element = element.select_one(selector)
+            if child_element is not None:
+                found[component_name] = child_element
+        return found
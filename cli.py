@@ -0,0 +1,318 @@
+"""
+Headless batch runner for large or scheduled audits, without the Streamlit UI.
+
+    python cli.py run urls.txt --out audit/ --inventory --links [--shard 1/4]
+    python cli.py run --sitemap https://www.example.com/sitemap.xml --out audit/ --inventory
+    python cli.py merge audit/ [--format xlsx|csv|parquet] [--reports-dir DIR]
+
+`run` scrapes a URL list (text file with one URL per line, or an .xlsx file with URLs in the first
+column, like the app) or a sitemap (sitemap indexes and .xml.gz sitemaps are followed). With
+--shard i/N it only takes the URLs whose hash falls into shard i of N (1-based), so N machines
+can each run one shard of the same list. Results are written to OUT/shard-i-of-N/ as numbered
+parts (Parquet or JSONL) every --flush-every URLs. Each part is committed by a checkpoint file,
+so an interrupted run skips the URLs it already finished when started again. URLs that fail with
+an unexpected error are not checkpointed and are retried by the next run.
+
+`merge` combines the finished parts of every shard in OUT into the three reports
+(component_inventory, asset_inventory, link_status_report) plus page_changes for incremental runs.
+
+scrape.py loads mapping.json from the working directory, so run this from the repository folder
+(or wherever your mapping.json is).
+"""
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+import pandas as pd
+
+from url_cache import normalize_url
+
+TABLES = ('content', 'assets', 'links', 'changes')
+REPORT_NAMES = {'content': 'component_inventory', 'assets': 'asset_inventory', 'links': 'link_status_report', 'changes': 'page_changes'}
+OUTPUT_FORMATS = ('parquet', 'jsonl')
+REPORT_FORMATS = ('xlsx', 'csv', 'parquet')
+EXCEL_MAX_ROWS = 1048575  # plus the header row
+SITEMAP_NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+# Only these names are parts and checkpoints; anything else in a shard folder (e.g. profiles) is left alone
+PART_FILE_RE = re.compile(rf"({'|'.join(TABLES)})-(\d{{6}})\.({'|'.join(OUTPUT_FORMATS)})")
+CHECKPOINT_FILE_RE = re.compile(r"checkpoint-(\d{6})\.json")
+
+
+# --- URL input ---
+def read_url_file(path):
+    """URLs from an .xlsx file (first column, like the app) or a text file with one URL per line."""
+    if path.endswith('.xlsx'):
+        values = pd.read_excel(path, header=None).iloc[:, 0].dropna().astype(str)
+    else:
+        with open(path, encoding='utf-8') as f:
+            values = f.read().splitlines()
+    return [value.strip() for value in values if value.strip().startswith(('http://', 'https://'))]
+
+
+def read_sitemap(sitemap_url, seen=None):
+    """Page URLs from a sitemap, following sitemap indexes. Gzipped sitemaps are decompressed."""
+    from scrape import HTTP_CLIENT
+
+    seen = seen if seen is not None else set()
+    if sitemap_url in seen:
+        return []
+    seen.add(sitemap_url)
+    response = HTTP_CLIENT.get(sitemap_url, timeout=30)
+    response.raise_for_status()
+    body = response.content
+    if body[:2] == b'\x1f\x8b':
+        body = gzip.decompress(body)
+    root = ET.fromstring(body)
+    locations = [loc.text.strip() for loc in root.iter(f'{SITEMAP_NS}loc') if loc.text]
+    if root.tag == f'{SITEMAP_NS}sitemapindex':
+        urls = []
+        for child_sitemap in locations:
+            urls += read_sitemap(child_sitemap, seen)
+        return urls
+    return locations
+
+
+def parse_shard(value):
+    """'i/N' -> (i, N), with 1 <= i <= N."""
+    match = re.fullmatch(r'(\d+)/(\d+)', value)
+    if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+        raise argparse.ArgumentTypeError("expected i/N with 1 <= i <= N, e.g. 2/4")
+    return int(match.group(1)), int(match.group(2))
+
+
+def shard_of(url, shard_count):
+    """1-based shard for a URL. A stable hash, so every machine assigns URLs the same way."""
+    digest = hashlib.sha1(normalize_url(url).encode('utf-8')).hexdigest()
+    return int(digest, 16) % shard_count + 1
+
+
+# --- Shard output ---
+def _arrow_safe(frame):
+    """Columns mixing types (e.g. 'Status Code': 404 or 'Error: Timeout') are stored as text in Parquet."""
+    for column in frame.columns[frame.dtypes == object]:
+        if frame[column].dropna().map(type).nunique() > 1:
+            frame[column] = frame[column].map(lambda value: value if value is None else str(value))
+    return frame
+
+
+class ShardWriter:
+    """
+    Writes a shard's rows to numbered part files. A part only counts once its checkpoint file, listing
+    the URLs it covers, has been written; parts without one are left over from an interrupted run and
+    are deleted, and their URLs are scraped again.
+    """
+
+    def __init__(self, directory, output_format='parquet'):
+        self.directory = directory
+        self.output_format = output_format
+        os.makedirs(directory, exist_ok=True)
+        self.done_urls = set()
+        parts = committed_parts(directory)
+        for part in parts:
+            with open(os.path.join(directory, f"checkpoint-{part:06d}.json"), encoding='utf-8') as f:
+                self.done_urls.update(json.load(f))
+        self.next_part = max(parts, default=-1) + 1
+        for name in os.listdir(directory):
+            part = PART_FILE_RE.fullmatch(name)
+            if part and int(part.group(2)) >= self.next_part:
+                os.remove(os.path.join(directory, name))
+        self._rows = {table: [] for table in TABLES}
+        self._urls = []
+
+    def add(self, url, tables):
+        for table, rows in tables.items():
+            self._rows[table].extend(rows)
+        self._urls.append(url)
+
+    def pending(self):
+        return len(self._urls)
+
+    def flush(self):
+        if not self._urls:
+            return
+        part = self.next_part
+        for table, rows in self._rows.items():
+            if not rows:
+                continue
+            path = os.path.join(self.directory, f"{table}-{part:06d}.{self.output_format}")
+            if self.output_format == 'parquet':
+                _arrow_safe(pd.DataFrame(rows)).to_parquet(path, index=False)
+            else:
+                with open(path, 'w', encoding='utf-8') as f:
+                    for row in rows:
+                        f.write(json.dumps(row, ensure_ascii=False, default=str) + '\n')
+        checkpoint_path = os.path.join(self.directory, f"checkpoint-{part:06d}.json")
+        with open(f"{checkpoint_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(self._urls, f)
+        os.replace(f"{checkpoint_path}.tmp", checkpoint_path)
+        self.done_urls.update(self._urls)
+        self.next_part += 1
+        self._rows = {table: [] for table in TABLES}
+        self._urls = []
+
+
+def committed_parts(directory):
+    """Numbers of the parts in a shard directory that have a checkpoint."""
+    return sorted(int(match.group(1)) for match in map(CHECKPOINT_FILE_RE.fullmatch, os.listdir(directory)) if match)
+
+
+def read_parts(directory, table):
+    """All committed parts of `table` in one shard directory, as DataFrames."""
+    committed = set(committed_parts(directory))
+    frames = []
+    for name in sorted(os.listdir(directory)):
+        part = PART_FILE_RE.fullmatch(name)
+        if not part or part.group(1) != table or int(part.group(2)) not in committed:
+            continue
+        path = os.path.join(directory, name)
+        frames.append(pd.read_parquet(path) if part.group(3) == 'parquet' else pd.read_json(path, lines=True, dtype=False, convert_dates=False))
+    return frames
+
+
+def write_profile(profiler, directory):
+    """Writes the run's profile next to its parts; one file pair per run, so resumed runs don't overwrite each other."""
+    stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(profiler.started))
+    with open(os.path.join(directory, f"profile-{stamp}.jsonl"), 'w', encoding='utf-8') as f:
+        f.write(profiler.to_jsonl())
+    with open(os.path.join(directory, f"trace-{stamp}.json"), 'w', encoding='utf-8') as f:
+        f.write(profiler.to_chrome_trace())
+    print(profiler.stage_table().to_string(index=False))
+    print(profiler.selector_table().head(10).to_string(index=False))
+
+
+# --- Commands ---
+def run(args):
+    from scrape import HTTP_CLIENT, LINK_STATUS_CACHE, LINK_STATUS_CACHE_PATH, BLOCK_MAPPING, scrape_many
+    from page_cache import PageCache, PAGE_CACHE_PATH
+    from profiler import Profiler
+
+    if not any([args.inventory, args.sizes, args.links]):
+        sys.exit("Choose at least one of --inventory, --sizes and --links.")
+    urls = read_sitemap(args.sitemap) if args.sitemap else read_url_file(args.urls)
+    urls = list(dict.fromkeys(urls))
+    shard_index, shard_count = args.shard
+    shard_urls = [url for url in urls if shard_of(url, shard_count) == shard_index]
+
+    writer = ShardWriter(os.path.join(args.out, f"shard-{shard_index}-of-{shard_count}"), args.format)
+    todo = [url for url in shard_urls if url not in writer.done_urls]
+    print(f"Shard {shard_index}/{shard_count}: {len(shard_urls)} of {len(urls)} URLs, {len(shard_urls) - len(todo)} already done, {len(todo)} to scrape.")
+    if not todo:
+        return
+
+    HTTP_CLIENT.set_rate_limit(args.rate_limit)
+    page_cache = PageCache(PAGE_CACHE_PATH, BLOCK_MAPPING).run() if args.incremental else None
+    profiler = Profiler(BLOCK_MAPPING) if args.profile else None
+    if args.links:
+        LINK_STATUS_CACHE.load(LINK_STATUS_CACHE_PATH)
+
+    started = time.time()
+    failed = 0
+    results = scrape_many(todo, do_inventory=args.inventory, fetch_sizes=args.sizes, check_links=args.links,
+                          max_workers=args.workers, per_host_limit=args.per_host_limit, engine=args.engine, parser=args.parser,
+                          parse_workers=args.parse_workers, page_cache=page_cache, profiler=profiler)
+    try:
+        for i, (url, content, assets, links, error) in enumerate(results):
+            if error is not None:
+                failed += 1
+                print(f"An unexpected error occurred while scraping {url}: {error}", file=sys.stderr)
+                continue
+            changes = [{"URL": url, "Status": page_cache.statuses[url]}] if page_cache is not None and url in page_cache.statuses else []
+            writer.add(url, {'content': content, 'assets': assets, 'links': links, 'changes': changes})
+            if writer.pending() >= args.flush_every:
+                writer.flush()
+                if args.links:
+                    LINK_STATUS_CACHE.save(LINK_STATUS_CACHE_PATH)
+                print(f"{i + 1}/{len(todo)} URLs done ({round(time.time() - started, 1)}s)")
+    finally:
+        # Also on Ctrl+C, so finished URLs are kept
+        writer.flush()
+        if args.links:
+            LINK_STATUS_CACHE.save(LINK_STATUS_CACHE_PATH)
+        if page_cache is not None:
+            page_cache.cache.close()
+        if profiler is not None:
+            write_profile(profiler, writer.directory)
+
+    stats = HTTP_CLIENT.stats()
+    print(f"Finished {len(todo) - failed} URL(s) in {round(time.time() - started, 2)} seconds, {failed} failed. "
+          f"{stats['requests']} requests, {stats['reuse_ratio']:.0%} connection reuse, {stats['retries']} retries.")
+    if failed:
+        sys.exit(1)
+
+
+def merge(args):
+    shard_dirs = sorted(glob.glob(os.path.join(args.out, 'shard-*-of-*')))
+    if not shard_dirs:
+        sys.exit(f"No shard folders found in {args.out}")
+    counts = {int(re.search(r'-of-(\d+)$', directory).group(1)) for directory in shard_dirs}
+    if len(counts) > 1:
+        print(f"Warning: {args.out} holds shards of runs with different shard counts {sorted(counts)}.", file=sys.stderr)
+
+    reports_dir = args.reports_dir or args.out
+    os.makedirs(reports_dir, exist_ok=True)
+    for table in TABLES:
+        frames = [frame for directory in shard_dirs for frame in read_parts(directory, table)]
+        if not frames:
+            continue
+        df = pd.concat(frames, ignore_index=True)
+        path = os.path.join(reports_dir, f"{REPORT_NAMES[table]}.{args.format}")
+        if args.format == 'xlsx':
+            if len(df) > EXCEL_MAX_ROWS:
+                print(f"{REPORT_NAMES[table]} has {len(df)} rows, more than Excel allows; writing CSV instead.", file=sys.stderr)
+                path = os.path.join(reports_dir, f"{REPORT_NAMES[table]}.csv")
+                df.to_csv(path, index=False)
+            else:
+                df.to_excel(path, index=False)
+        elif args.format == 'csv':
+            df.to_csv(path, index=False)
+        else:
+            _arrow_safe(df).to_parquet(path, index=False)
+        print(f"{path}: {len(df)} rows from {len(frames)} part(s)")
+
+
+def main():
+    from scrape import DEFAULT_PARSER, ENGINES, PARSER_BACKENDS
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Scrape a URL list or sitemap (or one shard of it)")
+    source = run_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('urls', nargs='?', help="Text file with one URL per line, or .xlsx with URLs in the first column")
+    source.add_argument('--sitemap', help="Sitemap or sitemap index URL")
+    run_parser.add_argument('--out', required=True, help="Output folder, shared by all shards")
+    run_parser.add_argument('--shard', type=parse_shard, default=(1, 1), help="Only scrape shard i of N (e.g. 2/4)")
+    run_parser.add_argument('--inventory', action='store_true', help="Component & asset inventory")
+    run_parser.add_argument('--sizes', action='store_true', help="Fetch asset file sizes")
+    run_parser.add_argument('--links', action='store_true', help="Check for broken links")
+    run_parser.add_argument('--incremental', action='store_true', help="Reuse unchanged pages from the page cache")
+    run_parser.add_argument('--workers', type=int, default=8, help="Concurrent pages")
+    run_parser.add_argument('--per-host-limit', type=int, default=8, help="Concurrent pages per host")
+    run_parser.add_argument('--engine', choices=ENGINES, default='threads')
+    run_parser.add_argument('--parser', choices=PARSER_BACKENDS, default=DEFAULT_PARSER)
+    run_parser.add_argument('--parse-workers', type=int, default=0, help="Parsing processes (0 parses in the fetch workers)")
+    run_parser.add_argument('--rate-limit', type=float, default=20, help="Max requests per second per host")
+    run_parser.add_argument('--format', choices=OUTPUT_FORMATS, default='parquet', help="Format of the shard part files")
+    run_parser.add_argument('--profile', action='store_true', help="Write per-page stage timings (profile-*.jsonl) and a Chrome trace (trace-*.json) to the shard folder")
+    run_parser.add_argument('--flush-every', type=int, default=50, help="URLs per part file / checkpoint")
+    run_parser.set_defaults(handler=run)
+
+    merge_parser = commands.add_parser('merge', help="Combine the shards in an output folder into the reports")
+    merge_parser.add_argument('out', help="Output folder given to `run --out`")
+    merge_parser.add_argument('--format', choices=REPORT_FORMATS, default='xlsx')
+    merge_parser.add_argument('--reports-dir', help="Where to write the reports (default: the output folder)")
+    merge_parser.set_defaults(handler=merge)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS')
+RETRY_STATUSES = (429, 503)
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class TokenBucket:
+    """A token bucket that allows `rate` requests per second with bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Takes one token and returns how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the token now (possibly going negative) so waiting callers queue up fairly
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0
+
+    def acquire(self):
+        """Takes one token, sleeping until it is available. Returns the time spent waiting."""
+        wait_seconds = self.reserve()
+        if wait_seconds:
+            time.sleep(wait_seconds)
+        return wait_seconds
+
+    async def acquire_async(self):
+        """Like acquire, but yields to the event loop while waiting."""
+        wait_seconds = self.reserve()
+        if wait_seconds:
+            await asyncio.sleep(wait_seconds)
+        return wait_seconds
+
+
+def _counting_pool(base_class, client):
+    """Returns a urllib3 pool class that reports every TCP/TLS connect (including reconnects) to `client`."""
+    class CountingConnection(base_class.ConnectionCls):
+        def connect(self):
+            client._count_connection()
+            return super().connect()
+
+    class CountingPool(base_class):
+        ConnectionCls = CountingConnection
+    return CountingPool
+
+
+def parse_retry_after(value):
+    """Parses a Retry-After header (seconds or an HTTP date) into seconds, or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HttpClient:
+    """
+    One shared HTTP client for all scrape requests: a pooled keep-alive session, a token-bucket rate limit
+    per host, retries with exponential backoff for idempotent requests, and request counters.
+    """
+
+    def __init__(self, pool_size=32, rate_per_host=20.0, burst_per_host=40, max_retries=3, backoff_factor=0.5, max_retry_after=60.0):
+        self.rate_per_host = rate_per_host
+        self.burst_per_host = burst_per_host
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_retry_after = max_retry_after
+        self.pool_size = 0
+        self.session = requests.Session()
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.reset_stats()
+        self.resize(pool_size)
+
+    def resize(self, pool_size):
+        """Makes sure the connection pool per host holds at least `pool_size` keep-alive connections."""
+        with self._lock:
+            if pool_size <= self.pool_size:
+                return
+            self.pool_size = pool_size
+        for prefix, base_class in (('http://', HTTPConnectionPool), ('https://', HTTPSConnectionPool)):
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            scheme = prefix.split(':')[0]
+            adapter.poolmanager.pool_classes_by_scheme = dict(adapter.poolmanager.pool_classes_by_scheme)
+            adapter.poolmanager.pool_classes_by_scheme[scheme] = _counting_pool(base_class, self)
+            self.session.mount(prefix, adapter)
+
+    def set_rate_limit(self, rate_per_host, burst_per_host=None):
+        """Changes the per-host rate limit for all hosts, including ones already seen."""
+        with self._lock:
+            self.rate_per_host = rate_per_host
+            self.burst_per_host = burst_per_host or max(1, int(rate_per_host * 2))
+            self._buckets.clear()
+
+    def bucket_for(self, url):
+        """Returns (host, TokenBucket) for a URL; the async engine shares these buckets."""
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate_per_host, self.burst_per_host)
+            return host, bucket
+
+    def _count_connection(self):
+        with self._lock:
+            self._connections += 1
+
+    def record(self, host, elapsed, num_bytes, throttled):
+        """Adds one request attempt to the counters."""
+        elapsed_ms = elapsed * 1000
+        bucket_index = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if elapsed_ms <= bound), len(LATENCY_BUCKETS_MS))
+        with self._lock:
+            self._requests += 1
+            self._bytes += num_bytes
+            self._throttled_seconds += throttled
+            self._latency_histogram[bucket_index] += 1
+            self._requests_per_host[host] = self._requests_per_host.get(host, 0) + 1
+
+    def count_error(self):
+        with self._lock:
+            self._errors += 1
+
+    def count_retry(self):
+        with self._lock:
+            self._retries += 1
+
+    def retry_delay(self, attempt, retry_after_header=None):
+        """Seconds to wait before the next attempt: the server's Retry-After if given, else exponential backoff."""
+        retry_after = parse_retry_after(retry_after_header)
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+        return self.backoff_factor * (2 ** attempt)
+
+    def request(self, method, url, **kwargs):
+        """
+        Sends a request through the shared session. Idempotent requests are retried on connection errors,
+        timeouts and 429/503 responses. The last response is returned (or the last exception raised) once
+        the retries are used up.
+        """
+        method = method.upper()
+        retries = self.max_retries if method in IDEMPOTENT_METHODS else 0
+        host, bucket = self.bucket_for(url)
+        for attempt in range(retries + 1):
+            throttled = bucket.acquire()
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self.record(host, time.perf_counter() - started, 0, throttled)
+                self.count_error()
+                if attempt >= retries:
+                    raise
+                time.sleep(self.retry_delay(attempt))
+                continue
+            num_bytes = 0 if kwargs.get('stream') or method == 'HEAD' else len(response.content)
+            self.record(host, time.perf_counter() - started, num_bytes, throttled)
+            if response.status_code in RETRY_STATUSES and attempt < retries:
+                self.count_retry()
+                delay = self.retry_delay(attempt, response.headers.get('Retry-After'))
+                response.close()
+                time.sleep(delay)
+                continue
+            return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.request('HEAD', url, **kwargs)
+
+    def reset_stats(self):
+        with self._lock:
+            self._requests = 0
+            self._connections = 0
+            self._bytes = 0
+            self._errors = 0
+            self._retries = 0
+            self._throttled_seconds = 0.0
+            self._latency_histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+            self._requests_per_host = {}
+
+    def stats(self):
+        """Returns a snapshot of the counters since the last reset."""
+        with self._lock:
+            labels = [f"<= {bound} ms" for bound in LATENCY_BUCKETS_MS] + [f"> {LATENCY_BUCKETS_MS[-1]} ms"]
+            return {
+                "requests": self._requests,
+                "new_connections": self._connections,
+                "reuse_ratio": round(1 - self._connections / self._requests, 3) if self._requests else 0.0,
+                "bytes": self._bytes,
+                "errors": self._errors,
+                "retries": self._retries,
+                "throttled_seconds": round(self._throttled_seconds, 2),
+                "latency_histogram": dict(zip(labels, self._latency_histogram)),
+                "requests_per_host": dict(self._requests_per_host),
+            }
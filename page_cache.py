@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+PAGE_CACHE_PATH = os.path.join('.scrape_cache', 'pages.sqlite')
+
+# Per-run page statuses shown in the report
+NEW, CHANGED, UNCHANGED = "New", "Changed", "Unchanged"
+
+
+def content_hash(body):
+    return hashlib.sha256(body).hexdigest()
+
+
+# Bumped when the shape of extracted rows changes, so rows cached by an older version are extracted again
+ROW_FORMAT = 2
+
+
+def mapping_hash(block_mapping):
+    """Cached rows are only valid for the mapping (and row format) they were extracted with."""
+    return hashlib.sha256(json.dumps([ROW_FORMAT, block_mapping], sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class CachedPage:
+    __slots__ = ('etag', 'last_modified', 'content_hash', 'content_rows', 'asset_rows', 'link_urls')
+
+    def __init__(self, etag, last_modified, content_hash, rows):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_hash = content_hash
+        self.content_rows, self.asset_rows, link_urls = rows
+        self.link_urls = set(link_urls)
+
+    def conditional_headers(self):
+        """If-None-Match / If-Modified-Since headers for re-fetching this page."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def rows(self, do_inventory, check_links):
+        """The cached extract_page output, trimmed to the requested options."""
+        return (self.content_rows if do_inventory else [],
+                self.asset_rows if do_inventory else [],
+                self.link_urls if check_links else set())
+
+
+class PageCache:
+    """
+    On-disk cache of fetched pages for incremental re-audits: the validators (ETag, Last-Modified), a hash
+    of the body and the offline extraction result (extract_page's rows, before asset sizes and link
+    statuses are resolved). Unchanged pages are answered with a 304 or an identical hash and reuse
+    their cached rows without being parsed again. One PageCache can be shared by concurrent runs; each run
+    scrapes through its own run() view, which records New/Changed/Unchanged per URL.
+    """
+
+    def __init__(self, path=PAGE_CACHE_PATH, block_mapping=None):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.mapping_hash = mapping_hash(block_mapping or [])
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    content_hash TEXT NOT NULL,
+                    mapping_hash TEXT NOT NULL,
+                    do_inventory INTEGER NOT NULL,
+                    check_links INTEGER NOT NULL,
+                    rows TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                )""")
+
+    def lookup(self, url, do_inventory=False, check_links=False):
+        """Returns the CachedPage for `url` if its rows cover the requested options, else None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified, content_hash, mapping_hash, do_inventory, check_links, rows FROM pages WHERE url = ?",
+                (url,)).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, cached_hash, cached_mapping_hash, cached_inventory, cached_links, rows = row
+        if (do_inventory and (not cached_inventory or cached_mapping_hash != self.mapping_hash)) or (check_links and not cached_links):
+            return None
+        return CachedPage(etag, last_modified, cached_hash, json.loads(rows))
+
+    def _previous_hash(self, url):
+        with self._lock:
+            row = self._db.execute("SELECT content_hash FROM pages WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def run(self):
+        """A view of this cache for one scrape run, with that run's own page statuses."""
+        return PageCacheRun(self)
+
+    def not_modified(self, url, cached, do_inventory=False, check_links=False):
+        """Handles a 304 answer to a conditional request: returns the page's cached rows."""
+        return cached.rows(do_inventory, check_links)
+
+    def reuse(self, url, cached, response_headers, body_hash, do_inventory=False, check_links=False):
+        """For a full 200 response: the cached rows if the body is identical to last time, else None."""
+        if cached is None or cached.content_hash != body_hash:
+            return None
+        with self._lock, self._db:
+            # The server may have sent new validators for the same content
+            self._db.execute(
+                "UPDATE pages SET etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified), fetched_at = ? WHERE url = ?",
+                (response_headers.get('ETag'), response_headers.get('Last-Modified'), time.time(), url))
+        return cached.rows(do_inventory, check_links)
+
+    def record(self, url, response_headers, body_hash, rows, do_inventory=False, check_links=False):
+        """Stores a freshly extracted page. Returns its status: New, Changed or (if only the options changed) Unchanged."""
+        previous_hash = self._previous_hash(url)
+        content_rows, asset_rows, link_urls = rows
+        serialized = json.dumps([content_rows, asset_rows, sorted(link_urls)])
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, response_headers.get('ETag'), response_headers.get('Last-Modified'), body_hash, self.mapping_hash,
+                 int(do_inventory), int(check_links), serialized, time.time()))
+        return NEW if previous_hash is None else CHANGED if previous_hash != body_hash else UNCHANGED
+
+    def clear(self):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM pages")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class PageCacheRun:
+    """
+    One run's view of a shared PageCache, passed to scrape_many(page_cache=...). Pages are read from and
+    written to the shared cache, but `statuses` (New/Changed/Unchanged per URL) belong to this run only,
+    so concurrent runs, e.g. two Streamlit sessions, don't clear or overwrite each other's.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.statuses = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, url, do_inventory=False, check_links=False):
+        return self.cache.lookup(url, do_inventory, check_links)
+
+    def not_modified(self, url, cached, do_inventory=False, check_links=False):
+        self.mark(url, UNCHANGED)
+        return self.cache.not_modified(url, cached, do_inventory, check_links)
+
+    def reuse(self, url, cached, response_headers, body_hash, do_inventory=False, check_links=False):
+        rows = self.cache.reuse(url, cached, response_headers, body_hash, do_inventory, check_links)
+        if rows is not None:
+            self.mark(url, UNCHANGED)
+        return rows
+
+    def record(self, url, response_headers, body_hash, rows, do_inventory=False, check_links=False):
+        self.mark(url, self.cache.record(url, response_headers, body_hash, rows, do_inventory, check_links))
+
+    def mark(self, url, status):
+        with self._lock:
+            self.statuses[url] = status
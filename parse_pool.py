@@ -0,0 +1,74 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from profiler import PageProfile
+from scrape import DEFAULT_PARSER, extract_page
+
+# Column order of a content row; packed rows are tuples in this order, without the page URL
+CONTENT_COLUMNS = ("Block Name", "Block Instance ID", "Component", "Value", "Source Element", "CSS Classes", "Readability Score", "Grade Level")
+# The free-text column of an asset row depends on its type
+ASSET_TEXT_COLUMN = {"Document": "Link Text", "Image": "Alt Text"}
+
+
+def pack_rows(content_rows, asset_rows, link_urls):
+    """Turns extract_page's output into compact tuples, so only values cross the process boundary."""
+    packed_content = [tuple(row[column] for column in CONTENT_COLUMNS) for row in content_rows]
+    packed_assets = [(row["Asset URL"], row["Asset Type"], row[ASSET_TEXT_COLUMN[row["Asset Type"]]], row["File Size"]) for row in asset_rows]
+    return packed_content, packed_assets, list(link_urls)
+
+
+def unpack_rows(url, packed):
+    """Inverse of pack_rows: rebuilds the exact rows extract_page would have returned for `url`."""
+    packed_content, packed_assets, link_urls = packed
+    content_rows = [{"URL": url, **dict(zip(CONTENT_COLUMNS, values))} for values in packed_content]
+    asset_rows = [{"Source Page URL": url, "Asset URL": asset_url, "Asset Type": asset_type, ASSET_TEXT_COLUMN[asset_type]: text, "File Size": size}
+                  for asset_url, asset_type, text, size in packed_assets]
+    return content_rows, asset_rows, set(link_urls)
+
+
+def _extract_packed(url, html_bytes, encoding, do_inventory, check_links, parser, profiled=False):
+    """
+    Runs in a worker process: decode, parse and extract one page. Returns (packed rows, profile data),
+    where the profile data (for PageProfile.merge) is None unless `profiled`.
+    """
+    profile = PageProfile(url) if profiled else None
+    html = html_bytes.decode(encoding, errors='replace') if encoding else html_bytes
+    packed = pack_rows(*extract_page(url, html, do_inventory=do_inventory, check_links=check_links, parser=parser, profile=profile))
+    return packed, profile.to_data() if profile is not None else None
+
+
+class ParsePool:
+    """
+    The CPU stage of the scrape pipeline: parsing, mapping extraction and readability scoring run in a pool
+    of worker processes, so they scale across cores instead of sharing one GIL with the fetch threads.
+    Pages go in as raw bytes and come back as packed row batches. At most `backlog` pages wait in or for
+    the pool; fetch threads calling `extract` block beyond that, which slows fetching down to parsing speed.
+    """
+
+    def __init__(self, workers, backlog=None):
+        self.workers = workers
+        # 'spawn' rather than fork: the parent is full of fetch threads, and forking a threaded process is unsafe
+        self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        self._slots = threading.BoundedSemaphore(backlog or workers * 2)
+
+    def submit(self, url, html_bytes, encoding=None, do_inventory=False, check_links=False, parser=DEFAULT_PARSER, profiled=False):
+        """Queues one page without backpressure; returns a Future of (packed rows, profile data or None)."""
+        return self._executor.submit(_extract_packed, url, html_bytes, encoding, do_inventory, check_links, parser, profiled)
+
+    def extract(self, url, html_bytes, encoding=None, do_inventory=False, check_links=False, parser=DEFAULT_PARSER, profile=None):
+        """Blocking counterpart of scrape.extract_page, run in a worker process."""
+        with self._slots:
+            packed, profile_data = self.submit(url, html_bytes, encoding, do_inventory, check_links, parser, profile is not None).result()
+        if profile is not None:
+            profile.merge(profile_data)
+        return unpack_rows(url, packed)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
@@ -0,0 +1,177 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+# Stages of a page, in pipeline order. 'mapping' excludes the time spent in 'textstat'.
+STAGES = ('fetch', 'parse', 'assets', 'links', 'mapping', 'textstat', 'asset_sizes', 'link_checks')
+
+
+class PageProfile:
+    """
+    Timings and counters for one page. Stages record their total seconds and a span (wall-clock start and
+    duration) for the trace. `selectors` holds, per BLOCK_MAPPING index, [selector tests, matches,
+    seconds spent matching, seconds spent extracting the block's components]. Everything is plain data,
+    so a profile filled in a parse worker process can be sent back and merged.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.started = time.time()
+        self.seconds = None
+        self.error = None
+        self.stages = {}
+        self.spans = []
+        self.bytes = 0
+        self.elements = 0
+        self.requests = {}
+        self.selectors = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        wall_start, started = time.time(), time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - started, wall_start)
+
+    def add_stage(self, name, seconds, wall_start=None):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+        if wall_start is not None:
+            self.spans.append((name, wall_start, seconds))
+
+    def count_request(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            self.requests[host] = self.requests.get(host, 0) + 1
+
+    def counting(self, resolve):
+        """Wraps a cache's compute function so every lookup that actually goes to the network is counted."""
+        def counted(url):
+            self.count_request(url)
+            return resolve(url)
+        return counted
+
+    def selector_test(self, block_index, seconds, matched):
+        entry = self.selectors.setdefault(block_index, [0, 0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += matched
+        entry[2] += seconds
+
+    def block_extracted(self, block_index, seconds):
+        self.selectors.setdefault(block_index, [0, 0, 0.0, 0.0])[3] += seconds
+
+    def finish(self, error=None):
+        self.seconds = time.time() - self.started
+        self.error = None if error is None else str(error)
+
+    def to_data(self):
+        return {"stages": self.stages, "spans": self.spans, "elements": self.elements, "selectors": self.selectors}
+
+    def merge(self, data):
+        """Adds the parse-side measurements taken by a worker process (see parse_pool.py)."""
+        for name, seconds in data["stages"].items():
+            self.add_stage(name, seconds)
+        self.spans.extend(tuple(span) for span in data["spans"])
+        self.elements += data["elements"]
+        for block_index, (tests, matches, match_seconds, extract_seconds) in data["selectors"].items():
+            entry = self.selectors.setdefault(block_index, [0, 0, 0.0, 0.0])
+            entry[0] += tests
+            entry[1] += matches
+            entry[2] += match_seconds
+            entry[3] += extract_seconds
+
+
+class Profiler:
+    """
+    Opt-in instrumentation for a scrape run: pass one to scrape_many(profiler=...) and every page gets a
+    PageProfile. Results are available as summary DataFrames, JSON lines (one record per page) and a
+    Chrome trace (open it in chrome://tracing or https://ui.perfetto.dev), with one row per page.
+    """
+
+    def __init__(self, block_mapping=None):
+        self.block_mapping = block_mapping or []
+        self.started = time.time()
+        self.pages = []
+        self._lock = threading.Lock()
+
+    def page(self, url):
+        profile = PageProfile(url)
+        with self._lock:
+            self.pages.append(profile)
+        return profile
+
+    def block_label(self, block_index):
+        return self.block_mapping[block_index]['name'] if block_index < len(self.block_mapping) else str(block_index)
+
+    # --- Summaries ---
+    def page_table(self):
+        """One row per page: total and per-stage seconds, bytes, elements visited and requests sent."""
+        rows = []
+        for profile in self.pages:
+            row = {"URL": profile.url, "Total (s)": profile.seconds}
+            row.update({f"{stage} (s)": profile.stages.get(stage, 0.0) for stage in STAGES})
+            row.update({"Bytes": profile.bytes, "Elements Visited": profile.elements,
+                        "Requests": sum(profile.requests.values()), "Error": profile.error})
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def stage_table(self):
+        """Seconds per stage, summed over all pages (stages of different pages overlap in time)."""
+        totals = {stage: sum(profile.stages.get(stage, 0.0) for profile in self.pages) for stage in STAGES}
+        return pd.DataFrame({"Stage": list(totals), "Seconds": list(totals.values())})
+
+    def selector_table(self):
+        """Cost per BLOCK_MAPPING entry over the whole run, most expensive first."""
+        totals = {}
+        for profile in self.pages:
+            for block_index, values in profile.selectors.items():
+                entry = totals.setdefault(block_index, [0, 0, 0.0, 0.0])
+                for i, value in enumerate(values):
+                    entry[i] += value
+        rows = [{"Block Name": self.block_label(block_index),
+                 "Selector": self.block_mapping[block_index]['selector'] if block_index < len(self.block_mapping) else None,
+                 "Selector Tests": tests, "Matches": matches, "Match (ms)": match_seconds * 1000,
+                 "Extract (ms)": extract_seconds * 1000, "Total (ms)": (match_seconds + extract_seconds) * 1000}
+                for block_index, (tests, matches, match_seconds, extract_seconds) in totals.items()]
+        if not rows:
+            return pd.DataFrame(rows)
+        return pd.DataFrame(rows).sort_values("Total (ms)", ascending=False).reset_index(drop=True)
+
+    def host_table(self):
+        hosts = {}
+        for profile in self.pages:
+            for host, count in profile.requests.items():
+                hosts[host] = hosts.get(host, 0) + count
+        return pd.Series(hosts, name="Requests", dtype=int).rename_axis("Host").reset_index()
+
+    # --- Export ---
+    def to_jsonl(self):
+        """One JSON record per page."""
+        lines = []
+        for profile in self.pages:
+            lines.append(json.dumps({
+                "url": profile.url, "seconds": profile.seconds, "error": profile.error, "stages": profile.stages,
+                "bytes": profile.bytes, "elements": profile.elements, "requests": profile.requests,
+                "selectors": {self.block_label(block_index): dict(zip(("tests", "matches", "match_seconds", "extract_seconds"), values))
+                              for block_index, values in profile.selectors.items()},
+            }))
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def to_chrome_trace(self):
+        """The run in Chrome's trace event format, one thread lane per page."""
+        events = []
+        for lane, profile in enumerate(self.pages, 1):
+            events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": lane, "args": {"name": profile.url}})
+            if profile.seconds is not None:
+                events.append({"name": "page", "cat": "page", "ph": "X", "pid": 1, "tid": lane,
+                               "ts": (profile.started - self.started) * 1e6, "dur": profile.seconds * 1e6,
+                               "args": {"url": profile.url, "bytes": profile.bytes, "elements": profile.elements, "error": profile.error}})
+            for name, wall_start, seconds in profile.spans:
+                events.append({"name": name, "cat": "stage", "ph": "X", "pid": 1, "tid": lane,
+                               "ts": (wall_start - self.started) * 1e6, "dur": seconds * 1e6})
+        return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Columns with few distinct, heavily repeated values are stored as pandas categories
+CATEGORY_COLUMNS = ("URL", "Block Name", "Block Instance ID", "Component", "Source Element", "CSS Classes",
+                    "Source Page URL", "Asset Type", "Status")
+
+
+class ResultStore:
+    """
+    Append-only store for scrape results. Rows are buffered per table and spilled to disk in chunks
+    (Parquet, or pickle for chunks Arrow can't encode, e.g. a 'Status Code' mixing ints and error strings),
+    so appending is O(rows appended) instead of copying an ever-growing DataFrame. A DataFrame is only
+    materialized when a table is displayed or exported, and reused until new rows arrive.
+    """
+
+    def __init__(self, chunk_rows=20000, directory=None):
+        self.chunk_rows = chunk_rows
+        self.directory = tempfile.mkdtemp(prefix='scrape-results-', dir=directory)
+        self._buffers = {}
+        self._chunks = {}
+        self._counts = {}
+        self._frames = {}
+        self._lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.directory, True)
+
+    def append(self, table, rows):
+        """Adds a list of row dicts to `table`."""
+        if not rows:
+            return
+        with self._lock:
+            buffer = self._buffers.setdefault(table, [])
+            buffer.extend(rows)
+            self._counts[table] = self._counts.get(table, 0) + len(rows)
+            self._frames.pop(table, None)
+            if len(buffer) >= self.chunk_rows:
+                self._spill(table)
+
+    def count(self, table):
+        """Number of rows in `table`, without materializing it."""
+        with self._lock:
+            return self._counts.get(table, 0)
+
+    def _spill(self, table):
+        buffer = self._buffers.pop(table, [])
+        if not buffer:
+            return
+        chunk = _with_categories(pd.DataFrame(buffer))
+        base_path = os.path.join(self.directory, f"{table}-{len(self._chunks.get(table, [])):06d}")
+        try:
+            path = f"{base_path}.parquet"
+            chunk.to_parquet(path, index=False)
+        except Exception:  # pyarrow missing, or mixed-type columns Arrow can't encode
+            path = f"{base_path}.pkl"
+            chunk.to_pickle(path)
+        self._chunks.setdefault(table, []).append(path)
+
+    def to_frame(self, table):
+        """Materializes `table` as one DataFrame with category dtypes for repeated strings."""
+        with self._lock:
+            frame = self._frames.get(table)
+            if frame is not None:
+                return frame
+            frames = [pd.read_parquet(path) if path.endswith('.parquet') else pd.read_pickle(path)
+                      for path in self._chunks.get(table, [])]
+            if self._buffers.get(table):
+                frames.append(_with_categories(pd.DataFrame(self._buffers[table])))
+            frame = _concat_with_categories(frames)
+            self._frames[table] = frame
+            return frame
+
+    def clear(self):
+        with self._lock:
+            for paths in self._chunks.values():
+                for path in paths:
+                    os.remove(path)
+            self._buffers.clear()
+            self._chunks.clear()
+            self._counts.clear()
+            self._frames.clear()
+
+
+def _with_categories(frame):
+    for column in CATEGORY_COLUMNS:
+        if column in frame.columns:
+            frame[column] = frame[column].astype('category')
+    return frame
+
+
+def _concat_with_categories(frames):
+    """pd.concat that keeps category columns as categories even when chunks have different categories."""
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+    for column in CATEGORY_COLUMNS:
+        parts = [frame[column] for frame in frames if column in frame.columns]
+        if len(parts) != len(frames) or not all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            continue
+        categories = union_categoricals(parts).categories
+        for frame in frames:
+            frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
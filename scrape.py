@@ -1,13 +1,25 @@
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, FeatureNotFound
 import pandas as pd
 from urllib.parse import urljoin
 import os
-import numpy as np
 import re
 import json
+import time
 import textstat
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit
+from url_cache import UrlCache
+from http_client import HttpClient
+from block_matcher import BlockMatcher, ClaimedSubtrees
+from page_cache import content_hash
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # Optional fast path, only needed for the 'selectolax' parser backend
+    LexborHTMLParser = None
 
 # --- Load the mapping from the external file ---
 try:
@@ -20,24 +32,90 @@ except json.JSONDecodeError:
     print("FATAL ERROR: Could not decode mapping.json. Please check for syntax errors.")
     BLOCK_MAPPING = []
 
-def get_asset_file_size(asset_url):
-    """Makes a HEAD request to get the size of an asset."""
+# Compiled once, so each page is walked once for all blocks instead of once per mapping entry
+BLOCK_MATCHER = BlockMatcher(BLOCK_MAPPING)
+
+# --- Shared HTTP client ---
+# Every page fetch, asset HEAD and link check goes through this one client, so connections are kept alive,
+# each host is rate limited and retries/counters are handled in one place.
+LINK_CHECK_WORKERS = 15
+HTTP_CLIENT = HttpClient(pool_size=32)
+
+# --- Asset sizes ---
+# The same logos and product images appear on hundreds of pages, so each asset URL is sized once per run.
+# Values are (size in bytes or None, None or a status/error note for the 'Size Status' column).
+ASSET_SIZE_WORKERS = 15
+ASSET_SIZE_CACHE = UrlCache(max_entries=200000, ttl_seconds=24 * 3600)
+# HEAD answers that don't give a size but a 1-byte range GET may
+HEAD_UNSUPPORTED_STATUSES = (405, 501)
+
+def content_range_total(content_range):
+    """Total size from a 'Content-Range: bytes 0-0/12345' header, or None if it is missing or '*'."""
+    match = re.match(r'bytes\s+\S+/(\d+)', content_range or '')
+    return int(match.group(1)) if match else None
+
+def size_from_response(status_code, headers):
+    """Size in bytes from a HEAD or range GET response, or None if it doesn't say."""
+    if status_code == 206:
+        return content_range_total(headers.get('Content-Range'))
+    if status_code == 200:
+        content_length = headers.get('Content-Length')
+        if content_length and content_length.isdigit() and int(content_length) > 0:
+            return int(content_length)
+    return None
+
+def size_status(status_code):
+    """The 'Size Status' note for a response that gave no size."""
+    return "No Size Reported" if status_code in (200, 206) else f"Status: {status_code}"
+
+def resolve_asset_size(asset_url):
+    """
+    Sizes one asset with a HEAD request. Many CDNs leave Content-Length off HEAD responses, so when HEAD
+    gives no size a `Range: bytes=0-0` GET is sent and the total is read from Content-Range.
+    Returns (size in bytes or None, status note or None).
+    """
     try:
-        response = requests.head(asset_url, timeout=10, allow_redirects=True) # Increased timeout
-        if response.status_code == 200:
-            size_in_bytes = int(response.headers.get('Content-Length', 0))
-            return f"{round(size_in_bytes / 1024, 2)} KB" if size_in_bytes > 0 else np.nan
-        return f"Status: {response.status_code}"
-    except requests.exceptions.RequestException:
-        return "Error: Request Failed"
+        response = HTTP_CLIENT.head(asset_url, timeout=10, allow_redirects=True) # Increased timeout
+        size = size_from_response(response.status_code, response.headers)
+        if size is not None:
+            return size, None
+        if response.status_code != 200 and response.status_code not in HEAD_UNSUPPORTED_STATUSES:
+            return None, size_status(response.status_code)
+        # stream=True: if the server ignores the range, only its headers are read
+        with HTTP_CLIENT.get(asset_url, timeout=10, headers={'Range': 'bytes=0-0'}, stream=True) as response:
+            size = size_from_response(response.status_code, response.headers)
+            return (size, None) if size is not None else (None, size_status(response.status_code))
+    except (requests.exceptions.RequestException, ValueError):  # ValueError: a URL that can't even be parsed
+        return None, "Error: Request Failed"
+
+def cached_asset_size(asset_url, cache=None, profile=None):
+    """Like resolve_asset_size, but each unique asset URL is only sized once across the whole run."""
+    cache = cache if cache is not None else ASSET_SIZE_CACHE
+    return cache.get_or_compute(asset_url, resolve_asset_size if profile is None else profile.counting(resolve_asset_size))
+
+def fill_asset_sizes(asset_rows, sizes):
+    """Sets 'File Size' (bytes) and 'Size Status' on asset rows from an {asset URL: (size, status)} dict."""
+    for asset_row in asset_rows:
+        asset_row["File Size"], asset_row["Size Status"] = sizes[asset_row["Asset URL"]]
+
+def fetch_asset_sizes(asset_rows, profile=None):
+    """Sizes a page's assets concurrently, through the shared cache."""
+    asset_urls = list(dict.fromkeys(asset_row["Asset URL"] for asset_row in asset_rows))
+    with ThreadPoolExecutor(max_workers=ASSET_SIZE_WORKERS) as executor:
+        sizes = dict(zip(asset_urls, executor.map(lambda asset_url: cached_asset_size(asset_url, profile=profile), asset_urls)))
+    fill_asset_sizes(asset_rows, sizes)
+
+# --- Shared link-status cache ---
+# Header, footer and navigation links repeat on every page, so each unique URL is only checked once per run.
+# Only real HTTP status codes are persisted to disk; transient errors are re-checked by a resumed job.
+LINK_STATUS_CACHE = UrlCache(max_entries=100000, ttl_seconds=24 * 3600, should_persist=lambda status: isinstance(status, int))
+LINK_STATUS_CACHE_PATH = os.path.join('.scrape_cache', 'link_status.json')
 
 def check_link_status(link_url):
     """Makes a HEAD request to check if a link is broken. Returns a tuple (url, status)."""
     try:
-        # Using a session object for potentially better performance with keep-alive
-        with requests.Session() as session:
-            response = session.head(link_url, timeout=10, allow_redirects=True) # Increased timeout
-            return link_url, response.status_code
+        response = HTTP_CLIENT.head(link_url, timeout=10, allow_redirects=True) # Increased timeout
+        return link_url, response.status_code
     except requests.exceptions.Timeout:
         return link_url, "Error: Timeout"
     except requests.exceptions.TooManyRedirects:
@@ -46,138 +124,371 @@ def check_link_status(link_url):
         # A more descriptive error for connection issues
         return link_url, f"Error: {type(e).__name__}"
 
-def scrape_single_url(url, do_inventory=False, fetch_sizes=False, check_links=False):
+def cached_link_status(link_url, cache=None, profile=None):
+    """Like check_link_status, but each unique URL is only checked once across the whole run."""
+    cache = cache if cache is not None else LINK_STATUS_CACHE
+    check = lambda u: check_link_status(u)[1]
+    status = cache.get_or_compute(link_url, check if profile is None else profile.counting(check))
+    return link_url, status
+
+def source_fetch_error_rows(url, error_name):
+    """The single "broken link" row reported when the page itself can't be fetched."""
+    return [{
+        "Source Page URL": "N/A",
+        "Linked URL": url,
+        "Status Code": f"Error fetching source URL: {error_name}"
+    }]
+
+# --- HTML parser backends ---
+# 'html.parser' is pure Python and always available. 'lxml' builds the same BeautifulSoup tree with the much
+# faster libxml2 parser. 'selectolax' parses with lexbor and scans assets and links straight from that tree;
+# the mapping extraction still runs on an lxml-built soup, which is only built when the inventory is requested.
+PARSER_BACKENDS = ('html.parser', 'lxml', 'selectolax')
+DEFAULT_PARSER = 'html.parser'
+
+def check_parser_backend(parser):
+    """Raises ValueError for an unknown backend and ImportError if its optional dependency is missing."""
+    if parser not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser '{parser}'. Choose one of: {', '.join(PARSER_BACKENDS)}")
+    if parser == 'selectolax' and LexborHTMLParser is None:
+        raise ImportError("The 'selectolax' parser requires selectolax. Install it with `pip install selectolax`.")
+    if parser in ('lxml', 'selectolax'):
+        try:
+            BeautifulSoup("", "lxml")
+        except FeatureNotFound:
+            raise ImportError(f"The '{parser}' parser requires lxml. Install it with `pip install lxml`.")
+
+def make_soup(html, parser=DEFAULT_PARSER):
+    """BeautifulSoup tree for the given backend; 'selectolax' uses lxml for the parts that need BeautifulSoup."""
+    return BeautifulSoup(html, "html.parser" if parser == 'html.parser' else "lxml")
+
+def extract_assets(soup, url):
+    """Finds all documents and images on a page. 'File Size' is None until sizes are fetched."""
+    asset_rows = []
+    asset_extensions = ['.pdf', '.docx', '.xlsx', '.zip', '.jpg', '.jpeg', '.png', '.svg', '.gif', '.webp']
+    found_asset_urls = set()
+    for a_tag in soup.find_all("a", href=True):
+        href = a_tag['href']
+        if href and any(href.lower().endswith(ext) for ext in asset_extensions):
+            asset_url = urljoin(url, href)
+            if asset_url not in found_asset_urls:
+                asset_rows.append({ "Source Page URL": url, "Asset URL": asset_url, "Asset Type": "Document", "Link Text": a_tag.get_text(strip=True), "File Size": None })
+                found_asset_urls.add(asset_url)
+
+    for img_tag in soup.find_all("img"):
+        src = img_tag.get('data-src') or img_tag.get('src')
+        if src:
+            asset_url = urljoin(url, src)
+            if asset_url not in found_asset_urls:
+                asset_rows.append({ "Source Page URL": url, "Asset URL": asset_url, "Asset Type": "Image", "Alt Text": img_tag.get('alt', ''), "File Size": None })
+                found_asset_urls.add(asset_url)
+    return asset_rows
+
+def extract_components(soup, url, profile=None):
+    """
+    Builds the component inventory rows for a page from BLOCK_MAPPING.
+    With a profile, the cost of each mapping entry and the time spent in textstat are recorded.
+    """
+    wall_start, started = time.time(), time.perf_counter()
+    textstat_seconds = 0.0
+    content_rows = []
+    block_counters = {}
+    block_matches, positions = BLOCK_MATCHER.match_blocks(soup, profile)
+    # Blocks claimed earlier in mapping order win; nothing inside them is counted again
+    scraped_elements = ClaimedSubtrees(positions)
+    for block_index, block_def in enumerate(BLOCK_MAPPING):
+        found_elements = block_matches[block_index]
+        for element in found_elements:
+            if scraped_elements.contains(element):
+                continue
+            block_started = time.perf_counter()
+
+            block_key = re.sub(r'[^a-zA-Z0-9]', '', block_def['name'].split(':')[0]).lower()
+            block_counters[block_key] = block_counters.get(block_key, 0) + 1
+            instance_id = f"{block_key}-{block_counters[block_key]}"
+
+            components = BLOCK_MATCHER.select_components(element, block_index, profile)
+            for component_name, selector in block_def['components'].items():
+                target_element = element
+                if selector and selector not in ('*', '[href]'):
+                    target_element = components.get(component_name)
+                
+                if not target_element: continue
+
+                value, is_text_content = '', True
+                attr_map = {'src': ['Image URL', 'Video URL', 'iframe URL'], 'href': ['Link', 'CTA Link', 'Download Link']}
+                
+                extracted = False
+                for attr, names in attr_map.items():
+                    if component_name in names:
+                        value = target_element.get(attr)
+                        is_text_content = False
+                        extracted = True
+                        break
+                
+                if not extracted:
+                    if selector == '[href]':
+                        value = target_element.get('href')
+                        is_text_content = False
+                    else:
+                        value = ' '.join(target_element.get_text(separator=" ", strip=True).split())
+
+                if value:
+                    if not is_text_content:
+                        full_url = urljoin(url, value) if (isinstance(value, str) and (value.startswith('/') or value.startswith('../'))) else value
+                        value = full_url
+
+                    readability_score, grade_level = None, None
+                    if is_text_content and len(value.split()) > 10:
+                        textstat_started = time.perf_counter()
+                        try:
+                            readability_score = textstat.flesch_reading_ease(value)
+                            grade_level = textstat.flesch_kincaid_grade(value)
+                        except: pass
+                        textstat_seconds += time.perf_counter() - textstat_started
+
+                    content_rows.append({
+                        "URL": url, "Block Name": block_def['name'], "Block Instance ID": instance_id,
+                        "Component": component_name, "Value": value, "Source Element": target_element.name.upper(),
+                        "CSS Classes": ' '.join(target_element.get('class', [])),
+                        "Readability Score": readability_score, "Grade Level": grade_level
+                    })
+
+            scraped_elements.claim(element)
+            if profile is not None:
+                profile.block_extracted(block_index, time.perf_counter() - block_started)
+
+    if profile is not None:
+        profile.add_stage('textstat', textstat_seconds)
+        profile.add_stage('mapping', time.perf_counter() - started - textstat_seconds, wall_start)
+    return content_rows
+
+def collect_links(soup, url):
+    """Returns the set of absolute URLs a page links to or loads (anchors, stylesheets, images, scripts, iframes)."""
+    all_links_on_page = set()
+    for tag in soup.find_all(['a', 'link'], href=True):
+        href = tag.get('href')
+        if href and not href.startswith(('mailto:', 'tel:', '#')):
+            all_links_on_page.add(urljoin(url, href))
+    for tag in soup.find_all(['img', 'script', 'iframe'], src=True):
+        src = tag.get('src')
+        if src:
+            all_links_on_page.add(urljoin(url, src))
+    return all_links_on_page
+
+def extract_assets_lexbor(tree, url):
+    """extract_assets on a selectolax tree; produces the same rows."""
+    asset_rows = []
+    asset_extensions = ['.pdf', '.docx', '.xlsx', '.zip', '.jpg', '.jpeg', '.png', '.svg', '.gif', '.webp']
+    found_asset_urls = set()
+    for a_tag in tree.css("a[href]"):
+        href = a_tag.attributes.get('href')
+        if href and any(href.lower().endswith(ext) for ext in asset_extensions):
+            asset_url = urljoin(url, href)
+            if asset_url not in found_asset_urls:
+                asset_rows.append({ "Source Page URL": url, "Asset URL": asset_url, "Asset Type": "Document", "Link Text": a_tag.text(strip=True), "File Size": None })
+                found_asset_urls.add(asset_url)
+
+    for img_tag in tree.css("img"):
+        src = img_tag.attributes.get('data-src') or img_tag.attributes.get('src')
+        if src:
+            asset_url = urljoin(url, src)
+            if asset_url not in found_asset_urls:
+                asset_rows.append({ "Source Page URL": url, "Asset URL": asset_url, "Asset Type": "Image", "Alt Text": img_tag.attributes.get('alt') or '', "File Size": None })
+                found_asset_urls.add(asset_url)
+    return asset_rows
+
+def collect_links_lexbor(tree, url):
+    """collect_links on a selectolax tree; returns the same set."""
+    all_links_on_page = set()
+    for tag in tree.css("a[href], link[href]"):
+        href = tag.attributes.get('href')
+        if href and not href.startswith(('mailto:', 'tel:', '#')):
+            all_links_on_page.add(urljoin(url, href))
+    for tag in tree.css("img[src], script[src], iframe[src]"):
+        src = tag.attributes.get('src')
+        if src:
+            all_links_on_page.add(urljoin(url, src))
+    return all_links_on_page
+
+def extract_page(url, html, do_inventory=False, check_links=False, parser=DEFAULT_PARSER, profile=None):
+    """
+    Parses a fetched page and runs every extraction step that doesn't need the network.
+    Returns (content_rows, asset_rows, link_urls); asset sizes and link statuses are resolved by the caller.
+    With a profile (see profiler.py), each step is timed.
+    """
+    stage = profile.stage if profile is not None else nullcontext
+    content_rows, asset_rows, link_urls = [], [], set()
+    if parser == 'selectolax':
+        with stage('parse'):
+            tree = LexborHTMLParser(html)
+        if do_inventory:
+            with stage('assets'):
+                asset_rows = extract_assets_lexbor(tree, url)
+            with stage('parse'):
+                soup = make_soup(html, parser)
+            content_rows = extract_components(soup, url, profile)
+        if check_links:
+            with stage('links'):
+                link_urls = collect_links_lexbor(tree, url)
+        return content_rows, asset_rows, link_urls
+
+    with stage('parse'):
+        soup = make_soup(html, parser)
+    if do_inventory:
+        with stage('assets'):
+            asset_rows = extract_assets(soup, url)
+        content_rows = extract_components(soup, url, profile)
+    if check_links:
+        with stage('links'):
+            link_urls = collect_links(soup, url)
+    return content_rows, asset_rows, link_urls
+
+def broken_link_row(url, linked_url, status):
+    return {
+        "Source Page URL": url,
+        "Linked URL": linked_url,
+        "Status Code": status
+    }
+
+def scrape_single_url(url, do_inventory=False, fetch_sizes=False, check_links=False, parser=DEFAULT_PARSER, parse_pool=None, page_cache=None, profile=None):
     """
     Scrapes a single URL based on the selected options.
+    With a parse_pool (see parse_pool.py), the page is handed over as raw bytes and extracted in a worker process.
+    With a page_cache (see page_cache.py), the page is fetched conditionally and an unchanged page reuses its
+    cached rows instead of being parsed again.
+    With a profile (a profiler.PageProfile), every stage is timed and bytes, elements and requests are counted.
     """
-    content_rows, asset_rows, link_rows = [], [], []
-    
+    stage = profile.stage if profile is not None else nullcontext
+    link_rows = []
+    cached = page_cache.lookup(url, do_inventory, check_links) if page_cache is not None else None
+
+    if profile is not None:
+        profile.count_request(url)
     try:
-        response = requests.get(url, timeout=15) # Increased timeout for the initial GET
+        with stage('fetch'):
+            response = HTTP_CLIENT.get(url, timeout=15, headers=cached.conditional_headers() if cached else None) # Increased timeout for the initial GET
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
     except requests.exceptions.RequestException as e:
         print(f"Failed to fetch {url}: {e}")
         # If the main page fails, create a single "broken link" entry for it.
-        link_rows.append({
-            "Source Page URL": "N/A",
-            "Linked URL": url,
-            "Status Code": f"Error fetching source URL: {type(e).__name__}"
-        })
-        return [], [], link_rows
+        return [], [], source_fetch_error_rows(url, type(e).__name__)
+    if profile is not None:
+        profile.bytes += len(response.content)
 
     # --- Option 1: Component & Asset Inventory ---
-    if do_inventory:
-        asset_extensions = ['.pdf', '.docx', '.xlsx', '.zip', '.jpg', '.jpeg', '.png', '.svg', '.gif', '.webp']
-        found_asset_urls = set()
-        for a_tag in soup.find_all("a", href=True):
-            href = a_tag['href']
-            if href and any(href.lower().endswith(ext) for ext in asset_extensions):
-                asset_url = urljoin(url, href)
-                if asset_url not in found_asset_urls:
-                    file_size = get_asset_file_size(asset_url) if fetch_sizes else 'N/A'
-                    asset_rows.append({ "Source Page URL": url, "Asset URL": asset_url, "Asset Type": "Document", "Link Text": a_tag.get_text(strip=True), "File Size": file_size })
-                    found_asset_urls.add(asset_url)
-
-        for img_tag in soup.find_all("img"):
-            src = img_tag.get('data-src') or img_tag.get('src')
-            if src:
-                asset_url = urljoin(url, src)
-                if asset_url not in found_asset_urls:
-                    file_size = get_asset_file_size(asset_url) if fetch_sizes else 'N/A'
-                    asset_rows.append({ "Source Page URL": url, "Asset URL": asset_url, "Asset Type": "Image", "Alt Text": img_tag.get('alt', ''), "File Size": file_size })
-                    found_asset_urls.add(asset_url)
-
-        scraped_elements = set()
-        block_counters = {}
-        for block_def in BLOCK_MAPPING:
-            found_elements = soup.select(block_def['selector'])
-            for element in found_elements:
-                if element in scraped_elements or any(p in scraped_elements for p in element.find_parents()):
-                    continue
-                
-                block_key = re.sub(r'[^a-zA-Z0-9]', '', block_def['name'].split(':')[0]).lower()
-                block_counters[block_key] = block_counters.get(block_key, 0) + 1
-                instance_id = f"{block_key}-{block_counters[block_key]}"
-
-                for component_name, selector in block_def['components'].items():
-                    target_element = element
-                    if selector and selector not in ('*', '[href]'):
-                        child_element = element.select_one(selector)
-                        target_element = child_element if child_element else None
-                    
-                    if not target_element: continue
-
-                    value, is_text_content = '', True
-                    attr_map = {'src': ['Image URL', 'Video URL', 'iframe URL'], 'href': ['Link', 'CTA Link', 'Download Link']}
-                    
-                    extracted = False
-                    for attr, names in attr_map.items():
-                        if component_name in names:
-                            value = target_element.get(attr)
-                            is_text_content = False
-                            extracted = True
-                            break
-                    
-                    if not extracted:
-                        if selector == '[href]':
-                            value = target_element.get('href')
-                            is_text_content = False
-                        else:
-                            value = ' '.join(target_element.get_text(separator=" ", strip=True).split())
-
-                    if value:
-                        if not is_text_content:
-                            full_url = urljoin(url, value) if (isinstance(value, str) and (value.startswith('/') or value.startswith('../'))) else value
-                            value = full_url
-
-                        readability_score, grade_level = None, None
-                        if is_text_content and len(value.split()) > 10:
-                            try:
-                                readability_score = textstat.flesch_reading_ease(value)
-                                grade_level = textstat.flesch_kincaid_grade(value)
-                            except: pass
-
-                        content_rows.append({
-                            "URL": url, "Block Name": block_def['name'], "Block Instance ID": instance_id,
-                            "Component": component_name, "Value": value, "Source Element": target_element.name.upper(),
-                            "CSS Classes": ' '.join(target_element.get('class', [])),
-                            "Readability Score": readability_score, "Grade Level": grade_level
-                        })
-
-                scraped_elements.add(element)
-                scraped_elements.update(element.find_all(True))
+    page_rows = None
+    if cached is not None and response.status_code == 304:
+        page_rows = page_cache.not_modified(url, cached, do_inventory, check_links)
+    elif page_cache is not None:
+        body_hash = content_hash(response.content)
+        page_rows = page_cache.reuse(url, cached, response.headers, body_hash, do_inventory, check_links)
+    if page_rows is None:
+        if parse_pool is not None:
+            page_rows = parse_pool.extract(url, response.content, response.encoding, do_inventory=do_inventory, check_links=check_links, parser=parser, profile=profile)
+        else:
+            page_rows = extract_page(url, response.text, do_inventory=do_inventory, check_links=check_links, parser=parser, profile=profile)
+        if page_cache is not None:
+            page_cache.record(url, response.headers, body_hash, page_rows, do_inventory, check_links)
+    content_rows, asset_rows, all_links_on_page = page_rows
+    if fetch_sizes and asset_rows:
+        with stage('asset_sizes'):
+            fetch_asset_sizes(asset_rows, profile)
 
     # --- Option 2: Broken Link Check (Now Concurrent) ---
     if check_links:
-        all_links_on_page = set()
-        for tag in soup.find_all(['a', 'link'], href=True):
-            href = tag.get('href')
-            if href and not href.startswith(('mailto:', 'tel:', '#')):
-                all_links_on_page.add(urljoin(url, href))
-        for tag in soup.find_all(['img', 'script', 'iframe'], src=True):
-            src = tag.get('src')
-            if src:
-                all_links_on_page.add(urljoin(url, src))
-        
-        with ThreadPoolExecutor(max_workers=15) as executor: # Slightly increased workers
-            future_to_url = {executor.submit(check_link_status, link): link for link in all_links_on_page}
+        with stage('link_checks'), ThreadPoolExecutor(max_workers=LINK_CHECK_WORKERS) as executor:
+            future_to_url = {executor.submit(cached_link_status, link, profile=profile): link for link in all_links_on_page}
             for future in as_completed(future_to_url):
                 try:
                     checked_url, status = future.result()
                     # Only report non-200 statuses
                     if status != 200:
-                        link_rows.append({
-                            "Source Page URL": url,
-                            "Linked URL": checked_url,
-                            "Status Code": status
-                        })
+                        link_rows.append(broken_link_row(url, checked_url, status))
                 except Exception as exc:
                     print(f'{future_to_url[future]} generated an exception: {exc}')
-                    link_rows.append({
-                        "Source Page URL": url,
-                        "Linked URL": future_to_url[future],
-                        "Status Code": f"Scraping Exception: {exc}"
-                    })
+                    link_rows.append(broken_link_row(url, future_to_url[future], f"Scraping Exception: {exc}"))
 
     return content_rows, asset_rows, link_rows
+
+ENGINES = ('threads', 'async')
+
+def scrape_many(urls, do_inventory=False, fetch_sizes=False, check_links=False, max_workers=8, per_host_limit=4, engine='threads', parser=DEFAULT_PARSER, parse_workers=0, page_cache=None, profiler=None):
+    """
+    Scrapes many URLs through a bounded worker pool with a per-host concurrency limit.
+    Yields (url, content_rows, asset_rows, link_rows, error) as each URL finishes, in completion order.
+    `error` is None on success; otherwise the row lists are empty and the URL should not be marked as processed.
+    engine='async' runs everything on one asyncio event loop instead (see scrape_async.py).
+    parser picks the HTML parser backend (see PARSER_BACKENDS).
+    parse_workers > 0 moves parsing and extraction into that many worker processes (see parse_pool.py);
+    0 keeps them in the fetch threads.
+    page_cache (a page_cache.PageCache's run() view) turns on incremental re-audits; its `statuses` say which pages changed.
+    profiler (a profiler.Profiler) turns on per-page, per-stage instrumentation.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}'. Choose one of: {', '.join(ENGINES)}")
+    check_parser_backend(parser)
+    if engine == 'async':
+        from scrape_async import iter_scrape_many_async  # Imported lazily: aiohttp is only needed for this engine
+        yield from iter_scrape_many_async(urls, do_inventory=do_inventory, fetch_sizes=fetch_sizes, check_links=check_links,
+                                          max_workers=max_workers, per_host_limit=per_host_limit, parser=parser,
+                                          parse_workers=parse_workers, page_cache=page_cache, profiler=profiler)
+        return
+
+    # Size the keep-alive pool so page fetches and their link checks don't have to open throwaway connections
+    HTTP_CLIENT.resize(max_workers * max(LINK_CHECK_WORKERS, ASSET_SIZE_WORKERS))
+
+    def host_of(u):
+        return urlsplit(u).netloc.lower()
+
+    # One queue per host, and a rotation of the hosts that have queued URLs and a free slot, so scheduling
+    # stays O(1) per URL even when a single-site audit keeps its one host at the limit.
+    pending_per_host = {}
+    for u in dict.fromkeys(urls):  # Keep the caller's order but drop duplicates
+        pending_per_host.setdefault(host_of(u), deque()).append(u)
+    ready_hosts = deque(pending_per_host)
+    in_flight_per_host = {}
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {}
+
+    def fill_pool():
+        # Hosts take turns, so one large site doesn't hold up the others.
+        while ready_hosts and len(futures) < max_workers:
+            host = ready_hosts.popleft()
+            next_url = pending_per_host[host].popleft()
+            in_flight_per_host[host] = in_flight_per_host.get(host, 0) + 1
+            if pending_per_host[host] and in_flight_per_host[host] < per_host_limit:
+                ready_hosts.append(host)
+            profile = profiler.page(next_url) if profiler is not None else None
+            future = executor.submit(scrape_single_url, next_url, do_inventory=do_inventory, fetch_sizes=fetch_sizes, check_links=check_links, parser=parser, parse_pool=parse_pool, page_cache=page_cache, profile=profile)
+            if profile is not None:
+                future.add_done_callback(lambda f, profile=profile: profile.finish(None if f.cancelled() else f.exception()))
+            futures[future] = next_url
+
+    parse_pool = None
+    if parse_workers:
+        from parse_pool import ParsePool  # Imported lazily: parse_pool imports this module
+        parse_pool = ParsePool(parse_workers)
+
+    try:
+        fill_pool()
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                done_url = futures.pop(future)
+                host = host_of(done_url)
+                in_flight_per_host[host] -= 1
+                # The host was out of the rotation if it was at its limit; a freed slot brings it back
+                if pending_per_host[host] and in_flight_per_host[host] == per_host_limit - 1:
+                    ready_hosts.append(host)
+                try:
+                    content_rows, asset_rows, link_rows = future.result()
+                    yield done_url, content_rows, asset_rows, link_rows, None
+                except Exception as exc:
+                    yield done_url, [], [], [], exc
+            fill_pool()
+    finally:
+        # If the consumer stops early (e.g. the Streamlit run is interrupted), don't start queued work.
+        executor.shutdown(wait=False, cancel_futures=True)
+        if parse_pool is not None:
+            parse_pool.shutdown()
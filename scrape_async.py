@@ -0,0 +1,291 @@
+import asyncio
+import queue
+import threading
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+from urllib.parse import urlsplit
+
+try:
+    import aiohttp
+except ImportError:  # The async engine is optional; the default thread engine only needs requests
+    aiohttp = None
+
+from http_client import RETRY_STATUSES
+from url_cache import normalize_url
+from parse_pool import ParsePool, unpack_rows
+from page_cache import content_hash
+from scrape import (ASSET_SIZE_CACHE, DEFAULT_PARSER, HEAD_UNSUPPORTED_STATUSES, HTTP_CLIENT, LINK_STATUS_CACHE, broken_link_row,
+                    extract_page, fill_asset_sizes, size_from_response, size_status, source_fetch_error_rows)
+
+# Upper bound on requests in flight at once, across all pages, assets and links
+DEFAULT_MAX_CONCURRENCY = 500
+
+_DONE = object()
+
+# javascript:, data:, ftp: and other non-HTTP links; requests raises InvalidSchema for these.
+# Older aiohttp versions have no such class and raise InvalidURL instead.
+_NON_HTTP_URL_ERRORS = getattr(aiohttp, 'NonHttpUrlClientError', ())
+
+
+def _requests_error_name(exc):
+    """Maps an aiohttp/asyncio exception to the requests exception name the thread engine would report."""
+    if isinstance(exc, asyncio.TimeoutError):
+        return "ReadTimeout"
+    if isinstance(exc, aiohttp.TooManyRedirects):
+        return "TooManyRedirects"
+    if isinstance(exc, _NON_HTTP_URL_ERRORS):
+        return "InvalidSchema"
+    if isinstance(exc, aiohttp.InvalidURL):
+        return "InvalidURL"
+    if isinstance(exc, aiohttp.ClientConnectionError):
+        return "ConnectionError"
+    return type(exc).__name__
+
+
+class AsyncFetcher:
+    """
+    Runs page fetches, asset HEADs and link HEADs as coroutines on one event loop.
+    A global semaphore bounds the requests in flight; rate limits, retries and counters are shared
+    with the thread engine's HTTP_CLIENT, link statuses with LINK_STATUS_CACHE and asset sizes with ASSET_SIZE_CACHE.
+    """
+
+    def __init__(self, session, max_concurrency=DEFAULT_MAX_CONCURRENCY, link_cache=None, parse_pool=None, page_cache=None, size_cache=None):
+        self.session = session
+        self.parse_pool = parse_pool
+        self.page_cache = page_cache
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.link_cache = link_cache if link_cache is not None else LINK_STATUS_CACHE
+        self.size_cache = size_cache if size_cache is not None else ASSET_SIZE_CACHE
+        self._link_tasks = {}  # normalized URL -> Task, coalesces concurrent checks of the same link
+        self._size_tasks = {}  # likewise for asset sizes
+
+    async def request(self, method, url, timeout, read_body=False, headers=None):
+        """Sends one request with the same retry policy as HttpClient. Returns (status, headers, body, charset)."""
+        retries = HTTP_CLIENT.max_retries
+        host, bucket = HTTP_CLIENT.bucket_for(url)
+        for attempt in range(retries + 1):
+            throttled = await bucket.acquire_async()
+            started = time.perf_counter()
+            try:
+                async with self.semaphore:
+                    async with self.session.request(method, url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout), allow_redirects=True) as response:
+                        body = await response.read() if read_body else b''
+                        status, response_headers, charset = response.status, response.headers, response.charset
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                HTTP_CLIENT.record(host, time.perf_counter() - started, 0, throttled)
+                HTTP_CLIENT.count_error()
+                if attempt >= retries:
+                    raise
+                await asyncio.sleep(HTTP_CLIENT.retry_delay(attempt))
+                continue
+            HTTP_CLIENT.record(host, time.perf_counter() - started, len(body), throttled)
+            if status in RETRY_STATUSES and attempt < retries:
+                HTTP_CLIENT.count_retry()
+                await asyncio.sleep(HTTP_CLIENT.retry_delay(attempt, response_headers.get('Retry-After')))
+                continue
+            return status, response_headers, body, charset
+
+    async def _resolve_asset_size(self, asset_url):
+        try:
+            status, headers, _, _ = await self.request('HEAD', asset_url, timeout=10)
+            size = size_from_response(status, headers)
+            if size is None and (status == 200 or status in HEAD_UNSUPPORTED_STATUSES):
+                status, headers, _, _ = await self.request('GET', asset_url, timeout=10, headers={'Range': 'bytes=0-0'})
+                size = size_from_response(status, headers)
+            result = (size, None) if size is not None else (None, size_status(status))
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):  # ValueError: a URL that can't even be parsed
+            result = (None, "Error: Request Failed")
+        self.size_cache.set(asset_url, result)
+        return result
+
+    async def asset_size(self, asset_url, profile=None):
+        """Async counterpart of scrape.cached_asset_size; returns (size, status note)."""
+        cached = self.size_cache.get(asset_url)
+        if cached is not None:
+            return cached
+        key = normalize_url(asset_url)
+        task = self._size_tasks.get(key)
+        if task is None:
+            if profile is not None:
+                profile.count_request(asset_url)
+            task = self._size_tasks[key] = asyncio.ensure_future(self._resolve_asset_size(asset_url))
+            task.add_done_callback(lambda _: self._size_tasks.pop(key, None))
+        return await task
+
+    async def _check_link(self, link_url):
+        try:
+            status = (await self.request('HEAD', link_url, timeout=10))[0]
+        except asyncio.TimeoutError:
+            status = "Error: Timeout"
+        except aiohttp.TooManyRedirects:
+            status = "Error: Too Many Redirects"
+        except aiohttp.ClientError as e:
+            status = f"Error: {_requests_error_name(e)}"
+        self.link_cache.set(link_url, status)
+        return status
+
+    async def link_status(self, link_url, profile=None):
+        """Async counterpart of scrape.cached_link_status; returns only the status."""
+        cached = self.link_cache.get(link_url)
+        if cached is not None:
+            return cached
+        key = normalize_url(link_url)
+        task = self._link_tasks.get(key)
+        if task is None:
+            if profile is not None:
+                profile.count_request(link_url)
+            task = self._link_tasks[key] = asyncio.ensure_future(self._check_link(link_url))
+            task.add_done_callback(lambda _: self._link_tasks.pop(key, None))
+        return await task
+
+    async def scrape_page(self, url, do_inventory=False, fetch_sizes=False, check_links=False, parser=DEFAULT_PARSER, profile=None):
+        """Async counterpart of scrape.scrape_single_url; returns the same three row lists."""
+        stage = profile.stage if profile is not None else nullcontext
+        page_cache = self.page_cache
+        cached = page_cache.lookup(url, do_inventory, check_links) if page_cache is not None else None
+        if profile is not None:
+            profile.count_request(url)
+        try:
+            with stage('fetch'):
+                status, response_headers, body, charset = await self.request('GET', url, timeout=15, read_body=True,
+                                                                             headers=cached.conditional_headers() if cached else None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Failed to fetch {url}: {e}")
+            return [], [], source_fetch_error_rows(url, _requests_error_name(e))
+        if status >= 400:
+            # Same row as requests' raise_for_status() produces in the thread engine
+            print(f"Failed to fetch {url}: HTTP {status}")
+            return [], [], source_fetch_error_rows(url, "HTTPError")
+        if profile is not None:
+            profile.bytes += len(body)
+
+        page_rows = None
+        if cached is not None and status == 304:
+            page_rows = page_cache.not_modified(url, cached, do_inventory, check_links)
+        elif page_cache is not None:
+            body_hash = content_hash(body)
+            page_rows = page_cache.reuse(url, cached, response_headers, body_hash, do_inventory, check_links)
+        if page_rows is None:
+            # Parsing is CPU-bound; run it off the loop (in a worker process if there's a pool) so requests keep flowing
+            if self.parse_pool is not None:
+                packed, profile_data = await asyncio.wrap_future(self.parse_pool.submit(url, body, charset, do_inventory, check_links, parser, profile is not None))
+                if profile is not None:
+                    profile.merge(profile_data)
+                page_rows = unpack_rows(url, packed)
+            else:
+                html = body.decode(charset, errors='replace') if charset else body
+                page_rows = await asyncio.to_thread(extract_page, url, html, do_inventory, check_links, parser, profile)
+            if page_cache is not None:
+                page_cache.record(url, response_headers, body_hash, page_rows, do_inventory, check_links)
+        content_rows, asset_rows, link_urls = page_rows
+
+        if fetch_sizes and asset_rows:
+            asset_urls = list(dict.fromkeys(row["Asset URL"] for row in asset_rows))
+            with stage('asset_sizes'):
+                sizes = await asyncio.gather(*(self.asset_size(asset_url, profile) for asset_url in asset_urls))
+            fill_asset_sizes(asset_rows, dict(zip(asset_urls, sizes)))
+
+        link_rows = []
+        if link_urls:
+            link_urls = list(link_urls)
+            with stage('link_checks'):
+                statuses = await asyncio.gather(*(self.link_status(link, profile) for link in link_urls), return_exceptions=True)
+            for link, status in zip(link_urls, statuses):
+                if isinstance(status, Exception):
+                    print(f'{link} generated an exception: {status}')
+                    link_rows.append(broken_link_row(url, link, f"Scraping Exception: {status}"))
+                elif status != 200:
+                    link_rows.append(broken_link_row(url, link, status))
+
+        return content_rows, asset_rows, link_rows
+
+
+async def scrape_many_async(urls, do_inventory=False, fetch_sizes=False, check_links=False, max_workers=50, per_host_limit=8, max_concurrency=DEFAULT_MAX_CONCURRENCY, parser=DEFAULT_PARSER, parse_workers=0, page_cache=None, profiler=None):
+    """
+    Async counterpart of scrape.scrape_many: an async generator of (url, content_rows, asset_rows, link_rows, error)
+    in completion order. At most `max_workers` pages (and `per_host_limit` per host) are processed at once,
+    and at most `max_concurrency` requests of any kind are in flight. `max_workers` also bounds the pages
+    waiting for a parse worker when `parse_workers` > 0.
+    """
+    if aiohttp is None:
+        raise ImportError("The async engine requires aiohttp. Install it with `pip install aiohttp`.")
+
+    page_slots = asyncio.Semaphore(max_workers)
+    host_slots = defaultdict(lambda: asyncio.Semaphore(per_host_limit))
+    connector = aiohttp.TCPConnector(limit=max_concurrency, limit_per_host=0, ttl_dns_cache=300)
+    headers = {'User-Agent': HTTP_CLIENT.session.headers.get('User-Agent')}
+
+    parse_pool = ParsePool(parse_workers) if parse_workers else None
+
+    async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
+        fetcher = AsyncFetcher(session, max_concurrency=max_concurrency, parse_pool=parse_pool, page_cache=page_cache)
+
+        async def run(page_url):
+            # Take the host slot first so a page waiting on a busy host doesn't hold a global page slot
+            async with host_slots[urlsplit(page_url).netloc.lower()]:
+                async with page_slots:
+                    profile = profiler.page(page_url) if profiler is not None else None
+                    try:
+                        content_rows, asset_rows, link_rows = await fetcher.scrape_page(page_url, do_inventory, fetch_sizes, check_links, parser, profile)
+                        error = None
+                    except Exception as exc:
+                        content_rows, asset_rows, link_rows, error = [], [], [], exc
+                    if profile is not None:
+                        profile.finish(error)
+                    return page_url, content_rows, asset_rows, link_rows, error
+
+        tasks = [asyncio.ensure_future(run(page_url)) for page_url in dict.fromkeys(urls)]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if parse_pool is not None:
+                parse_pool.shutdown()
+
+
+def iter_scrape_many_async(urls, **options):
+    """
+    Runs scrape_many_async on a background event loop and yields its results synchronously,
+    so callers like the Streamlit app can consume either engine the same way.
+    """
+    results = queue.Queue()
+    loop_ready = threading.Event()
+    state = {}
+
+    async def pump():
+        state['task'] = asyncio.current_task()
+        state['loop'] = asyncio.get_running_loop()
+        loop_ready.set()
+        async for item in scrape_many_async(urls, **options):
+            results.put(item)
+
+    def worker():
+        try:
+            asyncio.run(pump())
+        except asyncio.CancelledError:
+            pass
+        except BaseException as exc:
+            results.put(exc)
+        finally:
+            loop_ready.set()
+            results.put(_DONE)
+
+    thread = threading.Thread(target=worker, name="scrape-async-loop", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = results.get()
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # If the consumer stops early, cancel the run instead of letting it finish in the background
+        loop_ready.wait()
+        if thread.is_alive() and 'loop' in state:
+            state['loop'].call_soon_threadsafe(state['task'].cancel)
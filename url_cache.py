@@ -0,0 +1,137 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+_MISSING = object()
+
+
+def normalize_url(url):
+    """
+    Normalizes a URL for use as a cache key: lower-cased scheme and host, no default port, no fragment.
+    A URL that can't be parsed (e.g. a non-numeric port) is its own key, so the request still goes ahead
+    and reports the error.
+    """
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if port and port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    if parts.username:
+        host = f"{parts.username}@{host}"
+    return urlunsplit((scheme, host, parts.path or '/', parts.query, ''))
+
+
+class UrlCache:
+    """
+    A thread-safe, process-wide cache keyed by normalized URL, with a TTL and bounded LRU eviction.
+    Concurrent lookups of the same URL are coalesced so the value is only computed once.
+    """
+
+    def __init__(self, max_entries=50000, ttl_seconds=24 * 3600, should_persist=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.should_persist = should_persist or (lambda value: True)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (value, stored_at)
+        self._in_flight = {}  # key -> threading.Event set when the owner has finished computing
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _get_locked(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        value, stored_at = entry
+        if time.time() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def _set_locked(self, key, value, stored_at=None):
+        self._entries[key] = (value, stored_at if stored_at is not None else time.time())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, url, default=None):
+        with self._lock:
+            value = self._get_locked(normalize_url(url))
+        return default if value is _MISSING else value
+
+    def set(self, url, value):
+        with self._lock:
+            self._set_locked(normalize_url(url), value)
+
+    def get_or_compute(self, url, compute):
+        """Returns the cached value for `url`, calling `compute(url)` at most once across all threads on a miss."""
+        key = normalize_url(url)
+        while True:
+            with self._lock:
+                value = self._get_locked(key)
+                if value is not _MISSING:
+                    self.hits += 1
+                    return value
+                event = self._in_flight.get(key)
+                if event is None:
+                    self._in_flight[key] = threading.Event()
+                    self.misses += 1
+                    break
+            # Another thread is already computing this URL; wait for it and re-read the cache.
+            # If that thread failed, the loop makes this thread the new owner.
+            event.wait()
+
+        try:
+            value = compute(url)
+            with self._lock:
+                self._set_locked(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._in_flight.pop(key).set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def load(self, path):
+        """Loads unexpired entries from a JSON file written by `save`. A missing or corrupt file is ignored."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return 0
+        now = time.time()
+        loaded = 0
+        with self._lock:
+            for key, (value, stored_at) in stored.items():
+                if now - stored_at <= self.ttl_seconds and key not in self._entries:
+                    self._set_locked(key, value, stored_at)
+                    loaded += 1
+        return loaded
+
+    def save(self, path):
+        """Writes the persistable entries to a JSON file atomically."""
+        with self._lock:
+            stored = {key: [value, stored_at] for key, (value, stored_at) in self._entries.items() if self.should_persist(value)}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(stored, f)
+        os.replace(tmp_path, path)